@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def _valid(self, entry: tuple) -> bool:
+        return entry[0] >= time.monotonic()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._valid(entry):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[-1]
+
+    def _store(self, key: Hashable, entry: tuple):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, key: Hashable, value: Any):
+        self._store(key, (time.monotonic() + self.ttl, value))
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CatalogCache(TTLCache):
+    """Versioned in-memory cache for serialized catalog responses.
+
+    Every write to the catalog bumps the version, which invalidates all
+    entries at once. Entries also expire after ``ttl`` seconds and the
+    least recently used ones are evicted past ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.version = 0
+
+    def _valid(self, entry: tuple) -> bool:
+        return entry[1] == self.version and super()._valid(entry)
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None):
+        # Callers pass the version they read under so a write that raced
+        # with the query does not get cached as current
+        if version is None:
+            version = self.version
+        if version != self.version:
+            return
+        self._store(key, (time.monotonic() + self.ttl, version, value))
+
+    def bump(self):
+        self.version += 1
+        self.clear()
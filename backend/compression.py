@@ -0,0 +1,172 @@
+import zlib
+from typing import Dict, Optional, Tuple
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+# Preferred first when the client weighs them equally
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/", "image/svg+xml")
+# Per-request compression favours speed; cached payloads are compressed once, so harder
+DYNAMIC_LEVELS = {"br": 4, "gzip": 6}
+STATIC_LEVELS = {"br": 9, "gzip": 9}
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """Picks the best supported encoding from an Accept-Encoding header, or None."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    level = (STATIC_LEVELS if static else DYNAMIC_LEVELS)[encoding]
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def etag_for(etag: str, encoding: str) -> str:
+    # Each encoding is its own representation and needs its own strong validator
+    if etag.startswith('"') and etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def strip_etag_encoding(etag: str) -> str:
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+class PrecompressedBody:
+    """Raw response bytes plus every encoding, built once when the response is cached.
+
+    Building compresses at the slower static levels; do it off the event
+    loop for large bodies.
+    """
+
+    def __init__(self, raw: bytes, minimum_size: int):
+        self.raw = raw
+        self.encoded = {encoding: compress(raw, encoding, static=True) for encoding in ENCODINGS} if len(raw) >= minimum_size else {}
+
+    def select(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        encoding = accepted_encoding(accept_encoding) if self.encoded else None
+        if encoding is None:
+            return self.raw, None
+        return self.encoded[encoding], encoding
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=DYNAMIC_LEVELS["br"])
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(DYNAMIC_LEVELS["gzip"], zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        # Every chunk is flushed so streamed lists reach the client as they are produced
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if last else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating br/gzip for compressible responses.
+
+    Single-message bodies are compressed when at least ``minimum_size``
+    bytes; streamed bodies are always compressed chunk by chunk. Responses
+    that already carry a Content-Encoding (pre-compressed cache hits) and
+    event streams pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    def _compressible(self, status: int, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            status not in (204, 304)
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith("text/event-stream")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_wrapper(message):
+            if state["passthrough"]:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if state["compressor"] is None:
+                start = state["start"]
+                headers = MutableHeaders(scope=start)
+                if not self._compressible(start["status"], headers) or (not more_body and len(body) < self.minimum_size):
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = etag_for(headers["etag"], encoding)
+                if "content-length" in headers:
+                    del headers["content-length"]
+                if not more_body:
+                    compressed = compress(body, encoding)
+                    headers["Content-Length"] = str(len(compressed))
+                    state["passthrough"] = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                state["compressor"] = _StreamCompressor(encoding)
+                await send(start)
+            await send({
+                "type": "http.response.body",
+                "body": state["compressor"].chunk(body, last=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+from metrics import command_metrics
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('MONGODB_DB_NAME', 'roblox_gear_hub')
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def client_options() -> dict:
+    """Pool and timeout options from the environment; unset values keep the driver defaults."""
+    options = {
+        "maxPoolSize": _int_env('MONGO_MAX_POOL_SIZE'),
+        "minPoolSize": _int_env('MONGO_MIN_POOL_SIZE'),
+        "maxIdleTimeMS": _int_env('MONGO_MAX_IDLE_TIME_MS'),
+        "connectTimeoutMS": _int_env('MONGO_CONNECT_TIMEOUT_MS'),
+        "socketTimeoutMS": _int_env('MONGO_SOCKET_TIMEOUT_MS'),
+        "serverSelectionTimeoutMS": _int_env('MONGO_SERVER_SELECTION_TIMEOUT_MS'),
+        "waitQueueTimeoutMS": _int_env('MONGO_WAIT_QUEUE_TIMEOUT_MS'),
+    }
+    read_preference = os.environ.get('MONGO_READ_PREFERENCE')
+    if read_preference:
+        if read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Unknown MONGO_READ_PREFERENCE: {read_preference}")
+        options["readPreference"] = read_preference
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def read_preference(mode: str, max_staleness: int = -1):
+    """Builds a read preference by mode name; max_staleness (seconds, >= 90) is ignored for primary."""
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters fed by pymongo's CMAP events.
+
+    Events fire on Motor's worker threads; a check-out's start and end
+    happen on the same thread, which is how wait time is measured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.connections_open = 0
+        self.connections_in_use = 0
+        self.checkouts_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_wait_seconds_total = 0.0
+        self.checkout_wait_seconds_max = 0.0
+        self.pools_cleared = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connections_open": self.connections_open,
+                "connections_in_use": self.connections_in_use,
+                "checkouts_waiting": self.checkouts_waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_wait_seconds_total": self.checkout_wait_seconds_total,
+                "checkout_wait_seconds_max": self.checkout_wait_seconds_max,
+                "pools_cleared": self.pools_cleared,
+            }
+
+    def _finish_wait(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self.checkouts_waiting += 1
+
+    def connection_checked_out(self, event):
+        waited = self._finish_wait()
+        with self._lock:
+            self.checkouts_waiting -= 1
+            self.checkouts += 1
+            self.connections_in_use += 1
+            self.checkout_wait_seconds_total += waited
+            self.checkout_wait_seconds_max = max(self.checkout_wait_seconds_max, waited)
+
+    def connection_check_out_failed(self, event):
+        self._finish_wait()
+        with self._lock:
+            self.checkouts_waiting -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.connections_in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+pool_metrics = PoolMetrics()
+
+
+def create_client(url: Optional[str] = None) -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(url or MONGO_URL, event_listeners=[pool_metrics, command_metrics], **client_options())
@@ -0,0 +1,98 @@
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from prefix_index import normalize
+
+NGRAM_SIZE = 3
+# Small enough that a * h + b (a < 2**31, h < 2**32) cannot overflow uint64
+_PRIME = (1 << 31) - 1
+
+
+def shingles(text: str) -> Set[str]:
+    value = " ".join(normalize(text).split())
+    if not value:
+        return set()
+    padded = f" {value} "
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over character trigrams of normalized names.
+
+    Names are split into ``bands`` groups of ``rows`` MinHash values; two
+    names sharing any band bucket are candidates, and candidates are
+    confirmed by exact trigram Jaccard similarity against ``threshold``.
+    """
+
+    def __init__(self, threshold: float = 0.8, bands: int = 8, rows: int = 4, seed: int = 1667):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(bands * rows, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(bands * rows, 1), dtype=np.uint64)
+        self._buckets: Dict[Tuple[int, tuple], Set[Hashable]] = defaultdict(set)
+        self._items: Dict[Hashable, Tuple[Set[str], List[tuple]]] = {}
+
+    def _signature(self, grams: Set[str]) -> List[tuple]:
+        hashed = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        minhash = ((self._a * hashed + self._b) % np.uint64(_PRIME)).min(axis=1).tolist()
+        return [tuple(minhash[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def add(self, key: Hashable, name: str):
+        self.remove(key)
+        grams = shingles(name)
+        if not grams:
+            return
+        bands = self._signature(grams)
+        self._items[key] = (grams, bands)
+        for i, band in enumerate(bands):
+            self._buckets[(i, band)].add(key)
+
+    def remove(self, key: Hashable):
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        for i, band in enumerate(item[1]):
+            bucket = self._buckets.get((i, band))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[(i, band)]
+
+    def find(self, name: str, exclude: Optional[Hashable] = None) -> Optional[Tuple[Hashable, float]]:
+        """Returns the most similar indexed key at or above the threshold."""
+        grams = shingles(name)
+        if not grams:
+            return None
+        candidates = set()
+        for i, band in enumerate(self._signature(grams)):
+            candidates |= self._buckets.get((i, band), set())
+        candidates.discard(exclude)
+        best = None
+        for key in candidates:
+            score = jaccard(grams, self._items[key][0])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+    def keys(self) -> List[Hashable]:
+        return list(self._items)
+
+    def clear(self):
+        self._buckets.clear()
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,101 @@
+import asyncio
+import os
+from collections import deque
+from typing import Deque, Optional, Set, Tuple
+
+import orjson
+
+# Sent to a client that fell behind or missed events; it refetches and reconnects
+RESYNC = "resync"
+
+
+class Subscriber:
+    def __init__(self, max_queue: int, moderation: bool):
+        self.queue: "asyncio.Queue[Optional[Tuple[str, str, bytes]]]" = asyncio.Queue(max_queue)
+        self.moderation = moderation
+        self.closed = False
+
+    def close_with_resync(self):
+        # Dropping what is queued is fine: the client reloads everything anyway
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(("", RESYNC, b"{}"))
+        self.closed = True
+
+    def close(self):
+        # None ends the stream; the client reconnects on its own
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+        self.closed = True
+
+
+class EventBroker:
+    """Per-process fan-out of catalog and moderation events.
+
+    Each subscriber has a bounded queue; one that falls ``max_queue`` events
+    behind is sent a ``resync`` event and disconnected instead of slowing
+    publishers down. The last ``history`` events are kept so a reconnecting
+    client (SSE ``Last-Event-ID``) only receives what it missed.
+    """
+
+    def __init__(self, max_queue: int = 256, history: int = 1024):
+        self.max_queue = max_queue
+        # Event ids from another process (or before a restart) cannot be replayed
+        self.epoch = os.urandom(4).hex()
+        self._next = 0
+        self._history: Deque[Tuple[int, str, bytes, bool]] = deque(maxlen=history)
+        self._subscribers: Set[Subscriber] = set()
+        self.dropped = 0
+
+    def publish(self, kind: str, data: dict, moderation: bool = False):
+        """Queues the event for every subscriber; moderation events only reach moderators."""
+        self._next += 1
+        payload = orjson.dumps(data)
+        self._history.append((self._next, kind, payload, moderation))
+        event_id = f"{self.epoch}-{self._next}"
+        for subscriber in list(self._subscribers):
+            if subscriber.closed or (moderation and not subscriber.moderation):
+                continue
+            try:
+                subscriber.queue.put_nowait((event_id, kind, payload))
+            except asyncio.QueueFull:
+                subscriber.close_with_resync()
+                self.dropped += 1
+
+    def subscribe(self, moderation: bool = False, last_event_id: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(self.max_queue, moderation)
+        if last_event_id:
+            self._replay(subscriber, last_event_id)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def _replay(self, subscriber: Subscriber, last_event_id: str):
+        epoch, _, seq = last_event_id.partition("-")
+        oldest = self._history[0][0] if self._history else self._next + 1
+        if epoch != self.epoch or not seq.isdigit() or int(seq) + 1 < oldest:
+            subscriber.close_with_resync()
+            return
+        for n, kind, payload, moderation in self._history:
+            if n <= int(seq) or (moderation and not subscriber.moderation):
+                continue
+            try:
+                subscriber.queue.put_nowait((f"{self.epoch}-{n}", kind, payload))
+            except asyncio.QueueFull:
+                subscriber.close_with_resync()
+                return
+
+    def close_all(self):
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+def format_sse(event_id: str, kind: str, payload: bytes) -> bytes:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {kind}\n".encode() + b"data: " + payload + b"\n\n"
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from passlib.context import CryptContext
+
+
+class PasswordHashQueueFull(Exception):
+    pass
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a bounded thread pool.
+
+    bcrypt releases the GIL, so threads spread the work across cores and
+    the event loop stays free. Calls beyond ``max_workers`` wait in the
+    pool's queue; once ``max_queue`` calls are waiting, new calls are
+    refused with PasswordHashQueueFull instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.running = 0
+        self.completed = 0
+
+    @property
+    def queued(self) -> int:
+        return self.submitted - self.running - self.completed
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "running": self.running,
+            "queued": self.queued,
+            "completed": self.completed,
+        }
+
+    def _call(self, fn: Callable, *args):
+        with self._lock:
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def _withdraw(self, future: Future):
+        # A call cancelled while still queued never reaches _call
+        if future.cancelled():
+            with self._lock:
+                self.submitted -= 1
+
+    async def _submit(self, fn: Callable, *args):
+        with self._lock:
+            if self.queued >= self.max_queue:
+                raise PasswordHashQueueFull()
+            self.submitted += 1
+        try:
+            future = self._executor.submit(self._call, fn, *args)
+        except RuntimeError:
+            # The pool is shutting down
+            with self._lock:
+                self.submitted -= 1
+            raise
+        future.add_done_callback(self._withdraw)
+        # Cancelling the awaiting task cancels the pool future if it has not started
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(self.context.verify, plain_password, hashed_password)
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import io
+import ipaddress
+import os
+import socket
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from PIL import Image, ImageOps
+
+# format name -> (Pillow encoder, media type)
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+
+class ImageError(Exception):
+    """The source image could not be fetched or decoded."""
+
+
+def make_thumbnail(data: bytes, width: int, fmt: str, quality: int = 80) -> bytes:
+    """Scales the image to fit ``width`` x ``width`` (never upscaling) and re-encodes it."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # Lets the JPEG decoder downscale while decoding
+            image.draft("RGB", (width, width))
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            if fmt == "jpeg" and has_alpha:
+                # JPEG has no alpha channel: flatten onto white
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel("A"))
+            else:
+                image = image.convert("RGBA" if has_alpha else "RGB")
+            image.thumbnail((width, width), Image.LANCZOS)
+            out = io.BytesIO()
+            image.save(out, FORMATS[fmt][0], quality=quality)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise ImageError(f"Could not decode image: {e}") from e
+    return out.getvalue()
+
+
+class DiskCache:
+    """Blobs stored under the SHA-256 of their key, evicted least recently used past ``max_bytes``.
+
+    Recency is tracked in memory and seeded from file modification times,
+    so it survives restarts. Methods block on disk I/O; call them from a
+    worker thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.size = 0
+        self._load()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _load(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, digest, size in sorted(files):
+            self._entries[digest] = size
+            self.size += size
+
+    @staticmethod
+    def digest(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        digest = self.digest(key)
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.size -= self._entries.pop(digest, 0)
+            return None
+        # The file may have been written by another worker sharing the directory
+        with self._lock:
+            self.size += len(data) - self._entries.pop(digest, 0)
+            self._entries[digest] = len(data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        digest = self.digest(key)
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Workers share the directory; the name must be unique across processes too
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self.size += len(data) - self._entries.pop(digest, 0)
+            self._entries[digest] = len(data)
+            evicted = []
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                old, size = self._entries.popitem(last=False)
+                self.size -= size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def host_allowed(host: str, allowed_hosts: Iterable[str]) -> bool:
+    """``example.com`` (or ``*.example.com``) allows the domain and all its subdomains; ``*`` allows any host."""
+    host = host.lower().rstrip(".")
+    for allowed in allowed_hosts:
+        allowed = allowed.lower().removeprefix("*.")
+        if allowed == "*" or host == allowed or host.endswith("." + allowed):
+            return True
+    return False
+
+
+def public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+class ImageProxy:
+    """Fetches source images once and serves resized variants from the disk cache.
+
+    Concurrent requests for the same uncached variant share a single fetch
+    and resize. ``client`` is a pooled ``httpx.AsyncClient`` set at startup.
+    Every hop, redirects included, must target an allowed host that resolves
+    to public addresses only.
+    """
+
+    def __init__(self, cache: DiskCache, max_source_bytes: int, allowed_hosts: Iterable[str]):
+        self.cache = cache
+        self.max_source_bytes = max_source_bytes
+        self.allowed_hosts = list(allowed_hosts)
+        self.client: Optional[httpx.AsyncClient] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def check_url(self, url: str):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ImageError("Unsupported image URL")
+        if not host_allowed(parts.hostname, self.allowed_hosts):
+            raise ImageError(f"Image host not allowed: {parts.hostname}")
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise ImageError(f"Could not resolve {host}: {e}") from e
+        return [info[4][0] for info in infos]
+
+    async def _check_request(self, request: httpx.Request):
+        # Applied to every hop, so redirects cannot leave the allowed hosts or
+        # reach internal addresses
+        self.check_url(str(request.url))
+        for address in await self.resolve(request.url.host, request.url.port or (443 if request.url.scheme == "https" else 80)):
+            if not public_address(address):
+                raise ImageError(f"Image host {request.url.host} resolves to a non-public address")
+
+    def create_client(self, max_connections: int, timeout: float, transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=True,
+            event_hooks={"request": [self._check_request]},
+            transport=transport,
+        )
+
+    async def fetch(self, url: str) -> bytes:
+        self.check_url(url)
+        try:
+            async with self.client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise ImageError(f"Origin answered {response.status_code}")
+                data = bytearray()
+                async for chunk in response.aiter_bytes():
+                    data += chunk
+                    if len(data) > self.max_source_bytes:
+                        raise ImageError("Source image too large")
+        except httpx.HTTPError as e:
+            raise ImageError(f"Could not fetch image: {e}") from e
+        return bytes(data)
+
+    async def _once(self, key: str, produce):
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(produce())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # A client disconnecting must not cancel work other requests wait on
+        return await asyncio.shield(future)
+
+    async def source(self, url: str) -> bytes:
+        async def produce():
+            data = await self.fetch(url)
+            await asyncio.to_thread(self.cache.put, f"source\n{url}", data)
+            return data
+        return await self._once(f"source\n{url}", produce)
+
+    async def thumbnail(self, url: str, width: int, fmt: str) -> bytes:
+        key = f"thumbnail\n{url}\n{width}\n{fmt}"
+
+        async def produce():
+            data = await asyncio.to_thread(make_thumbnail, await self.source(url), width, fmt)
+            await asyncio.to_thread(self.cache.put, key, data)
+            return data
+        return await self._once(key, produce)
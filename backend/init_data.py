@@ -1,13 +1,13 @@
 import asyncio
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
 import uuid
 
+from database import DB_NAME, create_client
+from server import LIVE_GEARS, SYNC_STATE_ID, tombstone
+
 # Database connection
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.roblox_gear_hub
+client = create_client()
+db = client[DB_NAME]
 
 # Sample gears data with real Roblox gear images
 sample_gears = [
@@ -19,7 +19,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=16134749",
         "description": "Une épée puissante forgée dans les temps anciens.",
         "category": "joueurs",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -29,7 +30,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=13838250",
         "description": "Un bâton magique qui augmente les pouvoirs.",
         "category": "modérateur",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -39,7 +41,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=12902404",
         "description": "Lance des feux d'artifice spectaculaires.",
         "category": "événements",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -49,7 +52,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=16975630",
         "description": "Cette arme est trop puissante et donc interdite.",
         "category": "interdits",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -59,7 +63,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=11377306",
         "description": "Un bouclier qui protège contre les attaques.",
         "category": "joueurs",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -69,7 +74,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=13838309",
         "description": "Permet de créer des portails pour les modérateurs.",
         "category": "modérateur",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -79,7 +85,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=12144993",
         "description": "Fait du bruit pour animer les événements.",
         "category": "événements",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -89,23 +96,26 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=16975630",
         "description": "Outil utilisé pour exploiter - strictement interdit.",
         "category": "interdits",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     }
 ]
 
 async def init_database():
     try:
-        # Clear existing gears
-        await db.gears.delete_many({})
+        # Replace the catalog; deleted gears stay as tombstones so delta-sync clients drop them
+        await db.gears.update_many(LIVE_GEARS, tombstone(datetime.utcnow()))
         
         # Insert sample gears
         await db.gears.insert_many(sample_gears)
+        # Running workers reload the catalog on their next sync poll
+        await db.stats.update_one({"_id": SYNC_STATE_ID}, {"$inc": {"gears": 1}}, upsert=True)
         
         print(f"✅ Database initialized with {len(sample_gears)} sample gears")
         
         # Count gears per category
         for category in ["joueurs", "modérateur", "événements", "interdits"]:
-            count = await db.gears.count_documents({"category": category})
+            count = await db.gears.count_documents({"category": category, **LIVE_GEARS})
             print(f"   - {category}: {count} gears")
             
     except Exception as e:
@@ -5,11 +5,13 @@ Initialise la base de données avec des données de test
 """
 import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
 import uuid
 from passlib.context import CryptContext
 
+from database import DB_NAME, create_client
+from server import LIVE_GEARS
+
 # Configuration
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -26,7 +28,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=16134749",
         "description": "Une épée puissante forgée dans les temps anciens.",
         "category": "joueurs",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -36,7 +39,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=12902404",
         "description": "Un éclair qui frappe les ennemis avec une puissance divine.",
         "category": "joueurs",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -46,7 +50,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=11377306",
         "description": "Un bouclier qui protège contre les attaques.",
         "category": "joueurs",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -56,7 +61,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=13838250",
         "description": "Un bâton magique qui augmente les pouvoirs des modérateurs.",
         "category": "modérateur",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -66,7 +72,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=13838309",
         "description": "Permet de créer des portails pour les modérateurs.",
         "category": "modérateur",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -76,7 +83,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=12902404",
         "description": "Lance des feux d'artifice spectaculaires pour les événements.",
         "category": "événements",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -86,7 +94,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=12144993",
         "description": "Fait du bruit pour animer les événements.",
         "category": "événements",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -96,7 +105,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=12144993",
         "description": "Lance des confettis pour célébrer les événements spéciaux.",
         "category": "événements",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -106,7 +116,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=16975630",
         "description": "Cette arme est trop puissante et donc strictement interdite.",
         "category": "interdits",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     },
     {
         "id": str(uuid.uuid4()),
@@ -116,7 +127,8 @@ sample_gears = [
         "image_url": "https://assetdelivery.roblox.com/v1/asset/?id=16975630",
         "description": "Outil utilisé pour exploiter - strictement interdit.",
         "category": "interdits",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
     }
 ]
 
@@ -131,15 +143,15 @@ async def initialize_database():
     
     try:
         # Connexion à MongoDB
-        client = AsyncIOMotorClient(mongo_url)
-        db = client.roblox_gear_hub
+        client = create_client(mongo_url)
+        db = client[DB_NAME]
         
         # Vérifier la connexion
         await client.admin.command('ping')
         print("✅ Connexion à MongoDB établie")
         
         # Vérifier si des données existent déjà
-        existing_gears = await db.gears.count_documents({})
+        existing_gears = await db.gears.count_documents(LIVE_GEARS)
         existing_users = await db.users.count_documents({})
         
         # Initialiser les gears si nécessaire
@@ -165,7 +177,7 @@ async def initialize_database():
         
         # Compter les gears par catégorie
         for category in ["joueurs", "modérateur", "événements", "interdits"]:
-            count = await db.gears.count_documents({"category": category})
+            count = await db.gears.count_documents({"category": category, **LIVE_GEARS})
             print(f"   - {category}: {count} gears")
         
         client.close()
@@ -0,0 +1,345 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values
+        ]
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    def render_merged(self, snapshots: Dict[str, list]) -> List[str]:
+        # Totals add up across processes
+        merged = type(self)(self.name, self.documentation, self.labelnames)
+        for entries in snapshots.values():
+            for labels, value in entries:
+                merged.inc(*labels, amount=value)
+        return merged.render()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def render_merged(self, snapshots: Dict[str, list]) -> List[str]:
+        # Point-in-time values stay per process
+        merged = Gauge(self.name, self.documentation, self.labelnames + ("pid",))
+        for pid, entries in snapshots.items():
+            for labels, value in entries:
+                merged.set(*labels, pid, value=value)
+        return merged.render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, *labels: str, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(labels), list(counts), total, count] for labels, (counts, total, count) in self._series.items()]
+
+    def render_merged(self, snapshots: Dict[str, list]) -> List[str]:
+        merged = Histogram(self.name, self.documentation, self.labelnames, self.buckets[:-1])
+        for entries in snapshots.values():
+            for labels, counts, total, count in entries:
+                series = merged._series.setdefault(tuple(labels), [[0] * len(merged.buckets), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+        return merged.render()
+
+
+class Registry:
+    """Holds metrics plus collectors that report point-in-time values at scrape time."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, float]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, float]]]):
+        """collector() yields (name, help, value) gauges."""
+        self._collectors.append(collector)
+
+    def _collected(self) -> List[Tuple[str, str, float]]:
+        return [gauge for collector in self._collectors for gauge in collector()]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, documentation, value in self._collected():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {
+            "metrics": {metric.name: metric.snapshot() for metric in self._metrics},
+            "collected": self._collected(),
+        }
+
+    def render_merged(self, snapshots: Dict[str, dict], live: Iterable[str]) -> str:
+        """Renders the snapshots of several processes, keyed by pid, as one scrape.
+
+        Counters and histograms include every snapshot, so totals do not go
+        backwards when a worker is recycled; gauges only those of ``live`` pids.
+        """
+        live = set(live)
+        lines = []
+        for metric in self._metrics:
+            selected = snapshots if metric.kind != "gauge" else {pid: s for pid, s in snapshots.items() if pid in live}
+            lines.extend(metric.render_merged({pid: s["metrics"].get(metric.name, []) for pid, s in selected.items()}))
+        collected: Dict[str, Gauge] = {}
+        for pid, snapshot in snapshots.items():
+            if pid not in live:
+                continue
+            for name, documentation, value in snapshot["collected"]:
+                gauge = collected.setdefault(name, Gauge(name, documentation, ("pid",)))
+                gauge.set(pid, value=value)
+        for gauge in collected.values():
+            lines.extend(gauge.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsDirectory:
+    """Shares each process's metrics through one file per pid in ``path``.
+
+    Behind a pre-forking server every worker holds its own registry and a
+    scrape reaches just one of them; each worker writes its snapshot here
+    and whichever answers the scrape reports them all.
+    """
+
+    def __init__(self, path: str, registry: "Registry"):
+        self.path = path
+        self.registry = registry
+
+    def _file(self, pid: int) -> str:
+        return os.path.join(self.path, f"{pid}.json")
+
+    def write(self):
+        pid = os.getpid()
+        temporary = self._file(pid) + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(temporary, self._file(pid))
+
+    def read(self) -> Dict[str, dict]:
+        snapshots = {}
+        for entry in os.listdir(self.path):
+            if not entry.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.path, entry)) as f:
+                    snapshots[entry[:-len(".json")]] = json.load(f)
+            except (OSError, ValueError):
+                # Removed or being replaced by its worker right now
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        snapshots = self.read()
+        # Our own numbers are always current
+        snapshots[str(os.getpid())] = self.registry.snapshot()
+        return self.registry.render_merged(snapshots, live=[pid for pid in snapshots if _alive(int(pid))])
+
+    def clear(self):
+        """Drops the files of a previous run; call once before the workers start."""
+        os.makedirs(self.path, exist_ok=True)
+        for entry in os.listdir(self.path):
+            if entry.endswith((".json", ".tmp")):
+                os.remove(os.path.join(self.path, entry))
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies.", ("method", "route")))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("method", "route")))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size.", ("method", "route"), buckets=SIZE_BUCKETS))
+mongo_commands = registry.register(Counter(
+    "mongodb_commands_total", "MongoDB commands by outcome.", ("command", "collection", "outcome")))
+mongo_latency = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time.", ("command", "collection")))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics per route template, not per raw path."""
+
+    def __init__(self, app, routes_provider: Callable[[], Iterable]):
+        self.app = app
+        self.routes_provider = routes_provider
+
+    def _route_template(self, scope) -> str:
+        from starlette.routing import Match
+
+        for route in self.routes_provider():
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = self._route_template(scope)
+        status = {"code": 500}
+        size = {"bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                size["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec(method, route)
+            http_latency.observe(method, route, value=time.perf_counter() - started)
+            http_response_size.observe(method, route, value=size["bytes"])
+            http_requests.inc(method, route, str(status["code"]))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records command timings; the collection name is taken from the started event."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections: Dict[Tuple, str] = {}
+
+    def _key(self, event):
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        with self._lock:
+            self._collections[self._key(event)] = target if isinstance(target, str) else ""
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop(self._key(event), "")
+        mongo_latency.observe(event.command_name, collection, value=event.duration_micros / 1e6)
+        mongo_commands.inc(event.command_name, collection, outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+
+command_metrics = MongoCommandMetrics()
@@ -0,0 +1,96 @@
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+SUGGEST_FIELDS = ("id", "name", "nickname", "gear_id")
+
+
+def normalize(text: str) -> str:
+    # Case- and accent-insensitive form: "Épée" -> "epee"
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).strip()
+
+
+def gear_terms(gear: dict) -> set:
+    terms = set()
+    for field in ("name", "nickname"):
+        value = normalize(gear.get(field) or "")
+        if value:
+            terms.add(value)
+            # Also match from the start of every word ("leg" finds "Épée Légendaire")
+            terms.update(word for word in value.split() if word)
+    gear_id = normalize(str(gear.get("gear_id") or ""))
+    if gear_id:
+        terms.add(gear_id)
+    return terms
+
+
+class PrefixIndex:
+    """Sorted (term, gear id) array answering prefix lookups with bisect.
+
+    Lookups never touch Mongo. The index is built once from the gears
+    collection and then kept current by the write handlers.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[str, str]] = []
+        self._gears: Dict[str, dict] = {}
+        self._terms: Dict[str, set] = {}
+        self._object_ids: Dict[str, str] = {}
+        self._object_id_of: Dict[str, str] = {}
+
+    def build(self, gears: Iterable[dict]):
+        self._entries, self._gears, self._terms = [], {}, {}
+        self._object_ids, self._object_id_of = {}, {}
+        for gear in gears:
+            self._remember(gear)
+        self._entries = sorted((term, gid) for gid, terms in self._terms.items() for term in terms)
+
+    def _remember(self, gear: dict):
+        gid = gear["id"]
+        self._gears[gid] = {field: gear.get(field) for field in SUGGEST_FIELDS}
+        self._terms[gid] = gear_terms(gear)
+        if "_id" in gear:
+            self._object_ids[str(gear["_id"])] = gid
+            self._object_id_of[gid] = str(gear["_id"])
+
+    def add(self, gear: dict):
+        self.remove(gear["id"])
+        self._remember(gear)
+        for term in self._terms[gear["id"]]:
+            insort(self._entries, (term, gear["id"]))
+
+    def remove(self, gid: str):
+        terms = self._terms.pop(gid, None)
+        if terms is None:
+            return
+        self._gears.pop(gid, None)
+        object_id = self._object_id_of.pop(gid, None)
+        if object_id is not None:
+            self._object_ids.pop(object_id, None)
+        for term in terms:
+            i = bisect_left(self._entries, (term, gid))
+            if i < len(self._entries) and self._entries[i] == (term, gid):
+                del self._entries[i]
+
+    def id_for_object_id(self, object_id):
+        return self._object_ids.get(str(object_id))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        i = bisect_left(self._entries, (prefix, ""))
+        while i < len(self._entries) and len(results) < limit:
+            term, gid = self._entries[i]
+            if not term.startswith(prefix):
+                break
+            if gid not in seen:
+                seen.add(gid)
+                results.append(self._gears[gid])
+            i += 1
+        return results
+
+    def __len__(self):
+        return len(self._gears)
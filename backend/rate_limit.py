@@ -0,0 +1,92 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Tuple
+
+from pymongo import ReturnDocument
+
+
+class BucketBackend(ABC):
+    """Storage for token buckets.
+
+    ``take`` refills the bucket for ``key`` at ``rate`` tokens per second up
+    to ``burst``, then tries to remove one token. It returns whether the
+    token was granted and how many seconds until one will be available.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        ...
+
+
+class InMemoryBucketBackend(BucketBackend):
+    """Per-process buckets; the least recently used keys are dropped past ``max_keys``."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class MongoBucketBackend(BucketBackend):
+    """Buckets shared by every worker, updated atomically with a pipeline update.
+
+    The collection should carry a TTL index on ``updated_at`` so idle
+    buckets are cleaned up.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        now = datetime.utcnow()
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [burst, {"$add": [{"$ifNull": ["$tokens", burst]}, {"$multiply": [elapsed, rate]}]}]}
+        bucket = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        allowed = bucket["allowed"]
+        return allowed, 0.0 if allowed else (1 - bucket["tokens"]) / rate
+
+
+class RateLimiter:
+    def __init__(self, backend: BucketBackend, rate: float, burst: float):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+
+    async def check(self, *keys: str) -> float:
+        """Takes a token from each key's bucket; returns 0 if all allowed, else seconds to wait."""
+        retry_after = 0.0
+        for key in keys:
+            allowed, wait = await self.backend.take(key, self.rate, self.burst)
+            if not allowed:
+                retry_after = max(retry_after, wait)
+        return retry_after
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
@@ -0,0 +1,125 @@
+"""
+Production entrypoint: gunicorn pre-forking uvicorn workers.
+
+    python serve.py            # or: python server.py
+
+The app is imported once in the master (preload) and forked into
+WEB_CONCURRENCY workers (CPU count by default), each running uvicorn with
+uvloop and httptools when they are installed (uvicorn[standard]). Mongo
+clients, background tasks and the image proxy's HTTP pool are opened per
+worker by the app lifespan, after the fork.
+
+On SIGTERM each worker stops accepting connections, fails its readiness
+probe, ends open event streams and finishes in-flight requests within
+GRACEFUL_TIMEOUT seconds before the lifespan shutdown runs.
+
+Probes: GET /api/health/live and GET /api/health/ready (Mongo ping and
+index presence).
+
+Caches, the typeahead and near-duplicate indexes and the event broker live
+in each worker. With CATALOG_CHANGE_STREAM on (needs a replica set) every
+worker applies every write as it happens. Without it, workers poll a shared
+counter every CATALOG_SYNC_INTERVAL seconds and rebuild when another worker
+wrote; event-stream clients then get reload events instead of diffs.
+
+GET /metrics may be answered by any worker. With more than one worker
+each writes its metrics to METRICS_MULTIPROC_DIR (a fresh temporary
+directory unless set) and the one scraped reports them all: counters and
+histograms summed, gauges labelled by pid.
+"""
+
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn.main import Server
+from uvicorn.workers import UvicornWorker
+
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', '8001'))
+WORKERS = int(os.environ.get('WEB_CONCURRENCY', str(multiprocessing.cpu_count())))
+GRACEFUL_TIMEOUT = int(os.environ.get('GRACEFUL_TIMEOUT', '30'))
+WORKER_TIMEOUT = int(os.environ.get('WORKER_TIMEOUT', '60'))
+KEEPALIVE = int(os.environ.get('KEEPALIVE', '5'))
+# Recycling workers bounds slow leaks; 0 disables it
+MAX_REQUESTS = int(os.environ.get('MAX_REQUESTS', '0'))
+
+
+class DrainingServer(Server):
+    async def shutdown(self, sockets=None):
+        # Long-lived event streams would otherwise hold the worker until the timeout
+        from server import begin_drain
+
+        begin_drain()
+        await super().shutdown(sockets=sockets)
+
+
+class GearHubWorker(UvicornWorker):
+    # "auto" picks uvloop and httptools when installed, falling back to asyncio and h11
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Leave time for the lifespan shutdown before gunicorn kills the worker
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - 5)
+
+    async def _serve(self):
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+class GearHubApplication(BaseApplication):
+    def __init__(self, application, options: dict):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def main():
+    if WORKERS > 1:
+        # Must be set before the app is imported; files from an earlier run would be counted again
+        from metrics import MetricsDirectory, registry
+
+        os.environ.setdefault('METRICS_MULTIPROC_DIR', tempfile.mkdtemp(prefix='gear-hub-metrics-'))
+        MetricsDirectory(os.environ['METRICS_MULTIPROC_DIR'], registry).clear()
+
+    from server import CATALOG_CHANGE_STREAM, CATALOG_SYNC_INTERVAL, app
+
+    if WORKERS > 1 and not CATALOG_CHANGE_STREAM:
+        logging.getLogger("gear_hub").warning(
+            "%d workers without CATALOG_CHANGE_STREAM: writes reach the other workers by polling every %.1fs",
+            WORKERS, CATALOG_SYNC_INTERVAL,
+        )
+
+    options = {
+        "bind": f"{HOST}:{PORT}",
+        "workers": WORKERS,
+        "worker_class": GearHubWorker,
+        "preload_app": True,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "timeout": WORKER_TIMEOUT,
+        "keepalive": KEEPALIVE,
+        "max_requests": MAX_REQUESTS,
+        "max_requests_jitter": MAX_REQUESTS // 10,
+        "accesslog": "-",
+    }
+    GearHubApplication(app, options).run()
+
+
+if __name__ == "__main__":
+    main()
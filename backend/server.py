@@ -1,23 +1,70 @@
 import os
-from fastapi import FastAPI, HTTPException, Depends, Request
+import re
+import base64
+import hashlib
+import asyncio
+import logging
+import time
+import tempfile
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Request, Query
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, TEXT, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Mapping, Optional
 import uuid
 from datetime import datetime, timedelta
 import jwt
-from passlib.context import CryptContext
+import bson
+from bson import Timestamp
 import json
+import orjson
 
-# Database connection
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.roblox_gear_hub
+from cache import CatalogCache, TTLCache
+from hashing import PasswordHasher, PasswordHashQueueFull
+from prefix_index import SUGGEST_FIELDS, PrefixIndex
+from dedup import NearDuplicateIndex
+from rate_limit import InMemoryBucketBackend, MongoBucketBackend, RateLimiter, retry_after_header
+from database import DB_NAME, create_client, pool_metrics, read_preference
+from metrics import MetricsDirectory, MetricsMiddleware, registry
+from events import RESYNC, EventBroker, format_sse
+from images import FORMATS as IMAGE_FORMATS, DiskCache, ImageError, ImageProxy
+from compression import CompressionMiddleware, PrecompressedBody, etag_for, strip_etag_encoding
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("gear_hub")
+
+# Database connection, opened and closed with the app lifespan
+mongo_client: Optional[AsyncIOMotorClient] = None
+db = None
+# Public catalog reads may be served by secondaries; auth and moderation stay on db
+catalog_db = None
+CATALOG_READ_PREFERENCE = os.environ.get('CATALOG_READ_PREFERENCE', 'secondaryPreferred')
+CATALOG_MAX_STALENESS_SECONDS = int(os.environ.get('CATALOG_MAX_STALENESS_SECONDS', '90'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global mongo_client, db, catalog_db
+    mongo_client = create_client()
+    db = mongo_client[DB_NAME]
+    catalog_db = db.with_options(
+        read_preference=read_preference(CATALOG_READ_PREFERENCE, CATALOG_MAX_STALENESS_SECONDS)
+    )
+    image_proxy.client = image_proxy.create_client(IMAGE_PROXY_MAX_CONNECTIONS, IMAGE_PROXY_TIMEOUT)
+    try:
+        await startup_event()
+        yield
+    finally:
+        await shutdown_event()
+        await image_proxy.client.aclose()
+        mongo_client.close()
 
 # FastAPI app
-app = FastAPI(title="Roblox Gear Hub API")
+app = FastAPI(title="Roblox Gear Hub API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -26,14 +73,144 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Causal-Token"],
 )
 
+# br/gzip for responses above the threshold; cached catalog payloads are
+# stored pre-compressed and pass through untouched
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Request metrics per route template, exposed on GET /metrics
+app.add_middleware(MetricsMiddleware, routes_provider=lambda: app.router.routes)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+# Set (by serve.py with several workers) to a directory shared by the workers:
+# each writes its metrics there every METRICS_FLUSH_INTERVAL seconds and a
+# scrape of any worker reports all of them
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+metrics_directory = MetricsDirectory(METRICS_MULTIPROC_DIR, registry) if METRICS_MULTIPROC_DIR else None
+
 # Security
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1))),
+    max_queue=int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '64')),
+)
 SECRET_KEY = "your-secret-key-here-change-in-production"
 ALGORITHM = "HS256"
 
+# Catalog pagination
+GEAR_FIELDS = ("id", "name", "nickname", "gear_id", "image_url", "description", "category", "created_at", "updated_at")
+GEARS_MAX_PAGE_SIZE = int(os.environ.get('GEARS_MAX_PAGE_SIZE', '500'))
+SUGGESTION_STATUSES = ("pending", "approved", "rejected")
+GEAR_CATEGORIES = ("joueurs", "modérateur", "événements", "interdits")
+
+# Deleted gears leave a tombstone (id, created_at, updated_at, deleted) so delta
+# sync clients learn about the deletion; tombstones expire after the retention
+TOMBSTONE_TTL_SECONDS = int(os.environ.get('TOMBSTONE_TTL_SECONDS', str(30 * 24 * 3600)))
+LIVE_GEARS = {"deleted": {"$ne": True}}
+# Delta sync cursors stay this far behind the clock so writes that commit
+# out of updated_at order are not skipped
+CHANGES_SETTLE_SECONDS = float(os.environ.get('CHANGES_SETTLE_SECONDS', '5'))
+
+# Per-category gear counts live in one counter document kept current with $inc
+CATEGORY_STATS_ID = "gear_categories"
+STATS_RECONCILE_INTERVAL = float(os.environ.get('STATS_RECONCILE_INTERVAL', '3600'))
+MODERATION_MAX_BATCH = int(os.environ.get('MODERATION_MAX_BATCH', '1000'))
+
+# Streaming list responses
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Bulk NDJSON import/export
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', '1000'))
+BULK_MAX_REPORTED_ERRORS = 1000
+# Duplicate gear_ids block the unique indexes; startup refuses to run over them
+# unless this allows it to tombstone/reject all but the oldest of each
+DEDUPE_GEAR_IDS_ON_START = os.environ.get('DEDUPE_GEAR_IDS_ON_START', '').lower() in ('1', 'true', 'yes')
+
+# Catalog cache, invalidated by every gear write (and by the change stream when enabled).
+# A secondary may answer a read made right after a write with the old data, so with
+# secondary reads entries live no longer than the replication lag we accept
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', '300'))
+if CATALOG_READ_PREFERENCE != 'primary':
+    CATALOG_CACHE_TTL = min(CATALOG_CACHE_TTL, CATALOG_MAX_STALENESS_SECONDS)
+catalog_cache = CatalogCache(
+    max_entries=int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', '256')),
+    ttl=CATALOG_CACHE_TTL,
+)
+CATALOG_CHANGE_STREAM = os.environ.get('CATALOG_CHANGE_STREAM', '').lower() in ('1', 'true', 'yes')
+# Backoff between change stream reconnects
+CHANGE_STREAM_RETRY_MIN_SECONDS = 1.0
+CHANGE_STREAM_RETRY_MAX_SECONDS = float(os.environ.get('CHANGE_STREAM_RETRY_MAX_SECONDS', '30'))
+background_tasks: List[asyncio.Task] = []
+
+# Set by the launcher on SIGTERM: readiness fails and event streams end so the worker can drain
+draining = False
+
+# Server-sent catalog and moderation events (GET /api/events). With the change
+# stream enabled, events come from it so clients see writes from every worker.
+event_broker = EventBroker(
+    max_queue=int(os.environ.get('EVENTS_MAX_QUEUE', '256')),
+    history=int(os.environ.get('EVENTS_HISTORY', '1024')),
+)
+EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', '15'))
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', '1000'))
+EVENTS_TICKET_TTL_SECONDS = int(os.environ.get('EVENTS_TICKET_TTL_SECONDS', '60'))
+# Without the change stream, workers learn about each other's writes by polling
+# a counter document in db.stats that every write bumps
+SYNC_STATE_ID = "sync_state"
+CATALOG_SYNC_INTERVAL = float(os.environ.get('CATALOG_SYNC_INTERVAL', '2'))
+MODERATOR_ROLES = ("créateur", "responsable", "modérateur")
+
+# Admission control for the public suggestion endpoint
+SUGGESTION_RATE = float(os.environ.get('SUGGESTION_RATE_PER_MINUTE', '5')) / 60
+SUGGESTION_BURST = float(os.environ.get('SUGGESTION_BURST', '10'))
+SUGGESTION_MAX_IN_FLIGHT = int(os.environ.get('SUGGESTION_MAX_IN_FLIGHT', '32'))
+# Reverse proxies in front of the app that append to X-Forwarded-For; 0 ignores the header.
+# TRUST_FORWARDED_FOR=true is kept as a single proxy
+TRUSTED_PROXY_HOPS = int(os.environ.get(
+    'TRUSTED_PROXY_HOPS',
+    '1' if os.environ.get('TRUST_FORWARDED_FOR', '').lower() in ('1', 'true', 'yes') else '0',
+))
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+# The shared Mongo backend is attached at startup, once the client is open
+suggestion_limiter = RateLimiter(InMemoryBucketBackend(), rate=SUGGESTION_RATE, burst=SUGGESTION_BURST)
+suggestion_writes_in_flight = 0
+
+# Multi-document transactions and causally consistent reads need a replica set
+# or sharded cluster; detected at startup
+transactions_supported = False
+
+# Typeahead over gear names, nicknames and gear ids, served from memory
+gear_prefix_index = PrefixIndex()
+
+# Near-duplicate name detection over gears and pending suggestions,
+# keyed by ("gear", id) / ("suggestion", id)
+name_index = NearDuplicateIndex()
+
+# Gear image thumbnails, fetched from the origin once and kept in a disk cache
+IMAGE_WIDTHS = (64, 128, 256, 512)
+IMAGE_DEFAULT_WIDTH = 256
+IMAGE_PROXY_MAX_CONNECTIONS = int(os.environ.get('IMAGE_PROXY_MAX_CONNECTIONS', '20'))
+IMAGE_PROXY_TIMEOUT = float(os.environ.get('IMAGE_PROXY_TIMEOUT', '10'))
+image_proxy = ImageProxy(
+    DiskCache(
+        os.environ.get('IMAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gear_hub_images')),
+        max_bytes=int(os.environ.get('IMAGE_CACHE_MAX_BYTES', str(512 * 1024 * 1024))),
+    ),
+    max_source_bytes=int(os.environ.get('IMAGE_MAX_SOURCE_BYTES', str(10 * 1024 * 1024))),
+    # Domains and their subdomains; "*" allows any public host
+    allowed_hosts=[h.strip() for h in os.environ.get('IMAGE_PROXY_ALLOWED_HOSTS', 'roblox.com,rbxcdn.com').split(',') if h.strip()],
+)
+
+# Authenticated principals keyed by token subject, so auth does not read Mongo per request
+principal_cache = TTLCache(
+    max_entries=int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', '1024')),
+    ttl=float(os.environ.get('PRINCIPAL_CACHE_TTL', '60')),
+)
+
 # Pydantic models
 class GearBase(BaseModel):
     name: str
@@ -46,11 +223,14 @@ class GearBase(BaseModel):
 class Gear(GearBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
 
 class GearSuggestion(GearBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     status: str = "pending"  # "pending", "approved", "rejected"
+    # Gear or pending suggestion with a near-identical name, for moderators: {"kind", "id", "score"}
+    similar_to: Optional[dict] = None
 
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -73,12 +253,22 @@ class Token(BaseModel):
     token_type: str
     role: str
 
+class BatchModerationRequest(BaseModel):
+    ids: List[str]
+    action: str  # "approve", "reject"
+
 # Helper functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHashQueueFull:
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHashQueueFull:
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -90,42 +280,558 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def encode_cursor(doc: dict, field: str = "created_at") -> str:
+    # Keyset cursor on (field, id), opaque to clients
+    payload = json.dumps({"c": doc[field].isoformat(), "i": doc["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_after(cursor: str, field: str = "created_at") -> dict:
+    after_value, after_id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {"$gt": after_value}},
+        {field: after_value, "id": {"$gt": after_id}},
+    ]}
+
+def parse_fields(fields: Optional[str]):
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in GEAR_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id and created_at are always returned so the cursor can be built
+    projection = {"_id": 0, "id": 1, "created_at": 1}
+    for f in requested:
+        projection[f] = 1
+    return projection
+
+def json_body(docs) -> bytes:
+    # orjson serializes datetimes natively; documents are projected without _id
+    return orjson.dumps(docs)
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+async def stream_documents(cursor, ndjson: bool):
+    # Encodes documents as the cursor yields them, flushing in ~64 KB chunks
+    chunk = bytearray() if ndjson else bytearray(b"[")
+    first = True
+    async for doc in cursor:
+        if ndjson:
+            chunk += orjson.dumps(doc) + b"\n"
+        else:
+            if not first:
+                chunk += b","
+            chunk += orjson.dumps(doc)
+        first = False
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    if not ndjson:
+        chunk += b"]"
+    if chunk:
+        yield bytes(chunk)
+
+def streaming_list_response(request: Request, cursor) -> StreamingResponse:
+    ndjson = wants_ndjson(request)
+    media_type = NDJSON_MEDIA_TYPE if ndjson else "application/json"
+    return StreamingResponse(stream_documents(cursor, ndjson), media_type=media_type)
+
+def with_etag(body: bytes, headers: dict) -> dict:
+    # Strong validator derived from the exact bytes, so it agrees across workers
+    headers = dict(headers)
+    headers["ETag"] = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+    headers["Cache-Control"] = "no-cache"
+    return headers
+
+async def precompressed(body: bytes) -> PrecompressedBody:
+    # Static-level compression of a large catalog takes a while; keep it off the event loop
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return PrecompressedBody(body, COMPRESSION_MIN_SIZE)
+    return await asyncio.to_thread(PrecompressedBody, body, COMPRESSION_MIN_SIZE)
+
+def conditional_response(request: Request, body, headers: dict) -> Response:
+    # body is raw bytes (compressed by the middleware) or a cached PrecompressedBody
+    if isinstance(body, PrecompressedBody):
+        body, encoding = body.select(request.headers.get("accept-encoding", ""))
+        headers = dict(headers, Vary="Accept-Encoding")
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = etag_for(headers["ETag"], encoding)
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Validators differ per encoding only by suffix; any of them matches these bytes
+    candidates = [strip_etag_encoding(tag.strip()) for tag in if_none_match.split(",")]
+    return "*" in candidates or strip_etag_encoding(etag) in candidates
+
+def gear_event_data(doc: dict) -> dict:
+    return {field: doc[field] for field in GEAR_FIELDS if field in doc}
+
+def suggestion_event_data(doc: dict) -> dict:
+    return {**gear_event_data(doc), "status": doc.get("status"), "similar_to": doc.get("similar_to")}
+
+def publish_event(kind: str, data: dict, moderation: bool = False):
+    # With the change stream on, every worker publishes from the stream instead
+    if CATALOG_CHANGE_STREAM:
+        return
+    event_broker.publish(kind, data, moderation=moderation)
+    note_write("suggestions" if kind.startswith("suggestion.") else "gears")
+
+# Last sync_state counters this worker has caught up with
+sync_seen = {"gears": 0, "suggestions": 0}
+sync_pending: set = set()
+sync_flushes: set = set()
+
+def note_write(collection: str):
+    # The writes of one request share a single counter update
+    if not sync_pending:
+        task = asyncio.create_task(flush_sync_state())
+        sync_flushes.add(task)
+        task.add_done_callback(sync_flushes.discard)
+    sync_pending.add(collection)
+
+async def flush_sync_state():
+    collections = set(sync_pending)
+    sync_pending.clear()
+    try:
+        state = await db.stats.find_one_and_update(
+            {"_id": SYNC_STATE_ID},
+            {"$inc": {collection: 1 for collection in collections}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except PyMongoError as e:
+        logger.warning("Could not signal write to other workers: %s", e)
+        return
+    for collection in collections:
+        # Only our own increment since the last poll: nothing to pick up from other workers
+        if state[collection] == sync_seen[collection] + 1:
+            sync_seen[collection] = state[collection]
+
+async def poll_sync_state():
+    while True:
+        await asyncio.sleep(CATALOG_SYNC_INTERVAL)
+        try:
+            state = await db.stats.find_one({"_id": SYNC_STATE_ID}) or {}
+            changed = [collection for collection in sync_seen if state.get(collection, 0) != sync_seen[collection]]
+            if not changed:
+                continue
+            if "gears" in changed:
+                catalog_cache.bump()
+                await rebuild_gear_indexes()
+            else:
+                await rebuild_suggestion_names()
+            for collection in changed:
+                sync_seen[collection] = state.get(collection, 0)
+        except PyMongoError as e:
+            logger.warning("Cross-worker sync poll failed: %s", e)
+            continue
+        # Writes made by other workers come without a diff; clients reload
+        if "gears" in changed:
+            event_broker.publish("catalog.reloaded", {})
+        if "suggestions" in changed:
+            event_broker.publish("suggestions.reloaded", {}, moderation=True)
+
+def apply_gear_change(change: dict):
+    catalog_cache.bump()
+    operation = change["operationType"]
+    if operation == "delete":
+        gid = gear_prefix_index.id_for_object_id(change["documentKey"]["_id"])
+        if gid is not None:
+            unindex_gear(gid)
+            event_broker.publish("gear.deleted", {"id": gid})
+    elif change.get("fullDocument"):
+        gear = change["fullDocument"]
+        if gear.get("deleted"):
+            unindex_gear(gear["id"])
+            if "deleted" in change.get("updateDescription", {}).get("updatedFields", {}):
+                event_broker.publish("gear.deleted", {"id": gear["id"]})
+            return
+        index_gear(gear)
+        if operation == "update":
+            changed = gear_event_data(change["updateDescription"]["updatedFields"])
+            if changed:
+                event_broker.publish("gear.updated", {"id": gear["id"], **changed})
+        else:
+            kind = "gear.created" if operation == "insert" else "gear.updated"
+            event_broker.publish(kind, gear_event_data(gear))
+
+def apply_suggestion_change(change: dict):
+    suggestion = change.get("fullDocument")
+    if not suggestion:
+        return
+    if change["operationType"] == "insert":
+        event_broker.publish("suggestion.created", suggestion_event_data(suggestion), moderation=True)
+    elif "status" in change.get("updateDescription", {}).get("updatedFields", {}):
+        event_broker.publish(
+            "suggestion.status_changed",
+            {"id": suggestion["id"], "status": suggestion["status"]},
+            moderation=True,
+        )
+
+async def resync_catalog():
+    catalog_cache.bump()
+    await rebuild_gear_indexes()
+    event_broker.publish("catalog.reloaded", {})
+
+async def resync_suggestions():
+    await rebuild_suggestion_names()
+    event_broker.publish("suggestions.reloaded", {}, moderation=True)
+
+async def watch_changes(collection, apply, resync):
+    # Reconnects with backoff, resuming after the last change applied; writes
+    # may still have been missed, so local state is rebuilt after each reconnect
+    resume_token = None
+    delay = CHANGE_STREAM_RETRY_MIN_SECONDS
+    reconnecting = False
+    while True:
+        try:
+            async with collection.watch(full_document="updateLookup", resume_after=resume_token) as stream:
+                if reconnecting:
+                    await resync()
+                    logger.info("Change stream on %s resumed", collection.name)
+                delay = CHANGE_STREAM_RETRY_MIN_SECONDS
+                async for change in stream:
+                    apply(change)
+                    resume_token = stream.resume_token
+        except OperationFailure as e:
+            # Typically the resume point fell off the oplog; start from now instead
+            logger.warning("Change stream on %s failed, restarting in %.0fs: %s", collection.name, delay, e)
+            resume_token = None
+        except PyMongoError as e:
+            logger.warning("Change stream on %s lost, resuming in %.0fs: %s", collection.name, delay, e)
+        reconnecting = True
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, CHANGE_STREAM_RETRY_MAX_SECONDS)
+
+async def watch_catalog_changes():
+    # Picks up gear writes made by other workers; needs a replica set
+    await watch_changes(db.gears, apply_gear_change, resync_catalog)
+
+async def watch_suggestion_changes():
+    await watch_changes(db.suggestions, apply_suggestion_change, resync_suggestions)
+
+def countable_category(category) -> bool:
+    # Categories become field names in the counter document
+    return isinstance(category, str) and bool(category) and "." not in category and not category.startswith("$")
+
+async def inc_category_counts(deltas: dict, session=None):
+    increments = {f"counts.{category}": n for category, n in deltas.items() if n and countable_category(category)}
+    if increments:
+        await db.stats.update_one({"_id": CATEGORY_STATS_ID}, {"$inc": increments}, upsert=True, session=session)
+
+async def reconcile_category_counts():
+    # Recomputes the counters from the gears collection to repair any drift
+    counts = {}
+    async for row in db.gears.aggregate([
+        {"$match": LIVE_GEARS},
+        {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+    ]):
+        if countable_category(row["_id"]):
+            counts[row["_id"]] = row["count"]
+    await db.stats.replace_one({"_id": CATEGORY_STATS_ID}, {"counts": counts}, upsert=True)
+
+async def reconcile_category_counts_periodically():
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+        try:
+            await reconcile_category_counts()
+        except PyMongoError as e:
+            logger.warning("Category count reconciliation failed: %s", e)
+
+async def detect_transaction_support() -> bool:
+    try:
+        hello = await db.client.admin.command("hello")
+    except PyMongoError as e:
+        logger.warning("Could not detect deployment topology, transactions disabled: %s", e)
+        return False
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+@asynccontextmanager
+async def causal_session():
+    # Standalone servers have no replicas that could lag, so no session is needed
+    if not transactions_supported:
+        yield None
+        return
+    async with await mongo_client.start_session(causal_consistency=True) as session:
+        yield session
+
+def causal_token(session) -> Optional[str]:
+    # Opaque token a client echoes back in X-Causal-Token to read its own writes
+    if session is None or session.operation_time is None:
+        return None
+    payload = bson.encode({"ct": session.cluster_time, "ot": session.operation_time})
+    return base64.urlsafe_b64encode(payload).decode()
+
+def set_causal_token(response: Response, session):
+    token = causal_token(session)
+    if token:
+        response.headers["X-Causal-Token"] = token
+
+def causal_times(request: Request) -> Optional[dict]:
+    # The decoded X-Causal-Token, or None when absent, malformed or unusable here
+    token = request.headers.get("x-causal-token")
+    if not token or not transactions_supported:
+        return None
+    try:
+        times = bson.decode(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError, bson.errors.InvalidBSON):
+        return None
+    ct, ot = times.get("ct"), times.get("ot")
+    if not isinstance(ct, Mapping) or not isinstance(ct.get("clusterTime"), Timestamp) or not isinstance(ot, Timestamp):
+        return None
+    return times
+
+async def catalog_read(request: Request, read, times: Optional[dict] = None):
+    # Runs read(database, session) against the catalog. With a causal token,
+    # secondaries wait until they have replicated the client's writes; a token
+    # the cluster refuses (forged or stale $clusterTime) is dropped and the
+    # read goes to the primary instead
+    if times is None:
+        times = causal_times(request)
+    if times is None:
+        return await read(catalog_db, None)
+    try:
+        async with causal_session() as session:
+            session.advance_cluster_time(times["ct"])
+            session.advance_operation_time(times["ot"])
+            return await read(catalog_db, session)
+    except (TypeError, ValueError, OperationFailure) as e:
+        logger.info("Ignoring causal token refused by the cluster: %s", e)
+    return await read(db, None)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await user_from_token(credentials.credentials)
+
+async def user_from_token(token: str, purpose: Optional[str] = None) -> dict:
+    # Access tokens carry no purpose; tickets are only good for theirs
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or payload.get("purpose") != purpose:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
-    user = await db.users.find_one({"username": username})
+    user = principal_cache.get(username)
     if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+        user = await db.users.find_one({"username": username}, {"_id": 0, "password_hash": 0})
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal_cache.set(username, user)
+    # Handlers may mutate the principal, never hand out the cached dict
+    return dict(user)
+
+# Indexes for every lookup key used by the handlers
+INDEXES = {
+    "gears": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("category", ASCENDING), ("created_at", ASCENDING)], name="category_created_at"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+        # Tombstones drop gear_id, so the gear_id can be reused after a delete
+        IndexModel(
+            [("gear_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"gear_id": {"$type": "string"}},
+            name="gear_id_live_unique",
+        ),
+        IndexModel([("updated_at", ASCENDING), ("id", ASCENDING)], name="updated_at_id"),
+        # Only tombstones carry deleted_at; changing the retention needs a collMod
+        IndexModel([("deleted_at", ASCENDING)], expireAfterSeconds=TOMBSTONE_TTL_SECONDS, name="deleted_at_ttl"),
+        # Text index v3 folds diacritics, so "epee" matches "Épée"
+        IndexModel(
+            [("name", TEXT), ("nickname", TEXT), ("description", TEXT)],
+            weights={"name": 10, "nickname": 5, "description": 1},
+            default_language="french",
+            name="text_search",
+        ),
+    ],
+    "suggestions": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+        IndexModel(
+            [("gear_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"status": "pending"},
+            name="gear_id_pending_unique",
+        ),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+        # Newest write per status filter, for the list validator
+        IndexModel([("status", ASCENDING), ("updated_at", ASCENDING)], name="status_updated_at"),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True, name="username_unique"),
+    ],
+    "rate_limits": [
+        IndexModel([("updated_at", ASCENDING)], expireAfterSeconds=3600, name="updated_at_ttl"),
+    ],
+}
+
+# Superseded indexes, dropped so their replacements can be built
+OBSOLETE_INDEXES = {
+    "gears": ["gear_id", "gear_id_unique"],
+}
 
-# Initialize admin user on startup
-@app.on_event("startup")
+INDEX_NOT_FOUND = 27
+
+def tombstone(now: datetime) -> dict:
+    # Soft delete: the tombstone keeps only what delta sync needs
+    return {
+        "$set": {"deleted": True, "updated_at": now, "deleted_at": now},
+        "$unset": {field: "" for field in GEAR_FIELDS if field not in ("id", "created_at", "updated_at")},
+    }
+
+async def find_duplicate_gear_ids(collection: str, match: dict) -> List[dict]:
+    # Oldest first within each group; that one is kept
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"created_at": 1, "id": 1}},
+        {"$group": {"_id": "$gear_id", "ids": {"$push": "$id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    return [group async for group in db[collection].aggregate(pipeline)]
+
+async def dedupe_gear_ids():
+    # Unique indexes cannot be built over existing duplicates. Removing them
+    # destroys data, so it only happens when DEDUPE_GEAR_IDS_ON_START is set;
+    # otherwise startup stops and lists them
+    gears, suggestions = [], []
+    if "gear_id_live_unique" not in await db.gears.index_information():
+        gears = await find_duplicate_gear_ids("gears", {"gear_id": {"$type": "string"}})
+    if "gear_id_pending_unique" not in await db.suggestions.index_information():
+        suggestions = await find_duplicate_gear_ids("suggestions", {"status": "pending"})
+    if not gears and not suggestions:
+        return
+    logger.warning("Found %d duplicated gear_ids in gears and %d in pending suggestions", len(gears), len(suggestions))
+    for kind, groups in (("gears", gears), ("pending suggestions", suggestions)):
+        for group in groups:
+            logger.warning("Duplicate gear_id %s in %s: %s", group["_id"], kind, ", ".join(group["ids"]))
+    if not DEDUPE_GEAR_IDS_ON_START:
+        raise RuntimeError(
+            "Duplicate gear_ids prevent building the unique indexes; resolve them or restart once "
+            "with DEDUPE_GEAR_IDS_ON_START=true to keep the oldest of each"
+        )
+    # Keep the oldest document per gear_id, delete the other gears and reject the other suggestions
+    for group in gears:
+        extra = group["ids"][1:]
+        await db.gears.update_many({"id": {"$in": extra}}, tombstone(datetime.utcnow()))
+        logger.warning("Duplicate gear_id %s: kept gear %s, deleted %s", group["_id"], group["ids"][0], ", ".join(extra))
+    for group in suggestions:
+        extra = group["ids"][1:]
+        await db.suggestions.update_many(
+            {"id": {"$in": extra}, "status": "pending"},
+            {"$set": {"status": "rejected", "updated_at": datetime.utcnow()}},
+        )
+        logger.warning("Duplicate pending gear_id %s: kept suggestion %s, rejected %s", group["_id"], group["ids"][0], ", ".join(extra))
+
+async def ensure_indexes():
+    # create_indexes is a no-op for indexes that already exist with the same spec;
+    # any other failure propagates and aborts startup
+    for collection, names in OBSOLETE_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                try:
+                    await db[collection].drop_index(name)
+                except OperationFailure as e:
+                    # Another worker starting at the same time may have dropped it first
+                    if e.code != INDEX_NOT_FOUND:
+                        raise
+    await dedupe_gear_ids()
+    for collection, indexes in INDEXES.items():
+        started = time.perf_counter()
+        await db[collection].create_indexes(indexes)
+        logger.info("Indexes ready on %s in %.1f ms", collection, (time.perf_counter() - started) * 1000)
+
+async def backfill_updated_at():
+    # Documents written before updated_at existed count as last changed when created
+    for collection in ("gears", "suggestions"):
+        result = await db[collection].update_many(
+            {"updated_at": {"$exists": False}}, [{"$set": {"updated_at": "$created_at"}}]
+        )
+        if result.modified_count:
+            logger.info("Backfilled updated_at on %d %s", result.modified_count, collection)
+
+# Initialize indexes and admin user on startup
 async def startup_event():
+    await ensure_indexes()
+    await backfill_updated_at()
+    await rebuild_gear_indexes()
+
+    global transactions_supported
+    transactions_supported = await detect_transaction_support()
+
     # Check if root user exists
     root_user = await db.users.find_one({"username": "root"})
     if not root_user:
-        # Create root user
+        # Create root user; every worker runs this at boot, so only the first insert wins
         root_user_data = {
             "id": str(uuid.uuid4()),
-            "username": "root",
-            "password_hash": get_password_hash("Mouse123890!"),
+            "password_hash": await get_password_hash("Mouse123890!"),
             "role": "créateur",
             "created_at": datetime.utcnow()
         }
-        await db.users.insert_one(root_user_data)
-        print("Root user created successfully")
+        try:
+            result = await db.users.update_one({"username": "root"}, {"$setOnInsert": root_user_data}, upsert=True)
+        except DuplicateKeyError:
+            result = None
+        if result is not None and result.upserted_id is not None:
+            print("Root user created successfully")
+
+    if RATE_LIMIT_BACKEND == "mongo":
+        suggestion_limiter.backend = MongoBucketBackend(db.rate_limits)
+
+    await reconcile_category_counts()
+    background_tasks.append(asyncio.create_task(reconcile_category_counts_periodically()))
+    if CATALOG_CHANGE_STREAM:
+        background_tasks.append(asyncio.create_task(watch_catalog_changes()))
+        background_tasks.append(asyncio.create_task(watch_suggestion_changes()))
+    else:
+        state = await db.stats.find_one({"_id": SYNC_STATE_ID}) or {}
+        for collection in sync_seen:
+            sync_seen[collection] = state.get(collection, 0)
+        background_tasks.append(asyncio.create_task(poll_sync_state()))
+    if metrics_directory is not None:
+        background_tasks.append(asyncio.create_task(write_metrics_periodically()))
+
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    if metrics_directory is not None:
+        # A recycled worker's final counts keep adding to the totals
+        write_metrics()
+
+def write_metrics():
+    try:
+        metrics_directory.write()
+    except OSError as e:
+        logger.warning("Could not write metrics to %s: %s", METRICS_MULTIPROC_DIR, e)
+
+async def write_metrics_periodically():
+    while True:
+        write_metrics()
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
 
 # Auth endpoints
 @app.post("/api/auth/login", response_model=Token)
 async def login(login_request: LoginRequest):
     user = await db.users.find_one({"username": login_request.username})
-    if not user or not verify_password(login_request.password, user["password_hash"]):
+    if not user or not await verify_password(login_request.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
     access_token_expires = timedelta(hours=24)
@@ -153,115 +859,564 @@ async def create_user(user_request: CreateUserRequest, current_user: dict = Depe
     new_user = {
         "id": str(uuid.uuid4()),
         "username": user_request.username,
-        "password_hash": get_password_hash(user_request.password),
+        "password_hash": await get_password_hash(user_request.password),
         "role": user_request.role,
         "created_at": datetime.utcnow()
     }
     
-    await db.users.insert_one(new_user)
+    try:
+        await db.users.insert_one(new_user)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Username already exists")
+    principal_cache.invalidate(user_request.username)
     return {"message": "User created successfully"}
 
 # Gear endpoints
 @app.get("/api/gears", response_model=List[Gear])
-async def get_gears():
-    gears = []
-    async for gear in db.gears.find():
-        gear["_id"] = str(gear["_id"])
-        gears.append(gear)
-    return gears
+async def get_gears(
+    request: Request,
+    category: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=GEARS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    # Without a limit the whole (filtered) catalog is returned, as legacy clients expect.
+    # NDJSON clients get the documents streamed straight off the cursor instead.
+    # Clients reading their own writes (X-Causal-Token) bypass the cache.
+    ndjson = wants_ndjson(request)
+    times = causal_times(request)
+    causal = times is not None
+    cache_key = (category, q, limit, cursor, fields)
+    cached = None if ndjson or causal else catalog_cache.get(cache_key)
+    if cached is not None:
+        body, headers = cached
+        return conditional_response(request, body, headers)
+    version = catalog_cache.version
+
+    conditions = [LIVE_GEARS]
+    if category:
+        conditions.append({"category": category})
+    if q:
+        pattern = re.escape(q)
+        conditions.append({"$or": [
+            {"name": {"$regex": pattern, "$options": "i"}},
+            {"nickname": {"$regex": pattern, "$options": "i"}},
+            {"description": {"$regex": pattern, "$options": "i"}},
+        ]})
+    if cursor:
+        conditions.append(keyset_after(cursor))
+    query = {"$and": conditions}
+    projection = parse_fields(fields) or {"_id": 0}
+
+    sort = [("created_at", 1), ("id", 1)]
+    if ndjson:
+        # The stream outlives any session, so causal readers go to the primary
+        source = db if causal else catalog_db
+        gears_cursor = source.gears.find(query, projection).sort(sort)
+        if limit:
+            gears_cursor = gears_cursor.limit(limit)
+        return streaming_list_response(request, gears_cursor)
+    async def read(source, session):
+        gears_cursor = source.gears.find(query, projection, session=session).sort(sort)
+        if limit:
+            gears_cursor = gears_cursor.limit(limit + 1)
+        return await gears_cursor.to_list(length=None)
+    gears = await catalog_read(request, read, times)
+
+    headers = {}
+    if limit and len(gears) > limit:
+        gears = gears[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(gears[-1])
+
+    # Documents come straight from our own collection: skip per-item model validation
+    body = json_body(gears)
+    headers = with_etag(body, headers)
+    if not causal:
+        body = await precompressed(body)
+        catalog_cache.set(cache_key, (body, headers), version=version)
+    return conditional_response(request, body, headers)
+
+class GearSearchResult(Gear):
+    score: float
+
+@app.get("/api/gears/search", response_model=List[GearSearchResult])
+async def search_gears(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=GEARS_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    times = causal_times(request)
+    causal = times is not None
+    cache_key = ("search", q, category, limit, offset)
+    cached = None if causal else catalog_cache.get(cache_key)
+    if cached is not None:
+        body, headers = cached
+        return conditional_response(request, body, headers)
+    version = catalog_cache.version
+
+    query = {"$text": {"$search": q}, **LIVE_GEARS}
+    if category:
+        query["category"] = category
+    score = {"$meta": "textScore"}
+    results = await catalog_read(request, lambda source, session: (
+        source.gears.find(query, {"_id": 0, "score": score}, session=session)
+        .sort([("score", score), ("created_at", 1)])
+        .skip(offset)
+        .limit(limit)
+        .to_list(length=None)
+    ), times)
+
+    body = json_body(results)
+    headers = with_etag(body, {})
+    if not causal:
+        body = await precompressed(body)
+        catalog_cache.set(cache_key, (body, headers), version=version)
+    return conditional_response(request, body, headers)
+
+@app.get("/api/gears/suggest")
+async def suggest_gears(prefix: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    return gear_prefix_index.suggest(prefix, limit)
+
+@app.get("/api/gears/stats")
+async def get_gear_stats(request: Request):
+    stats = await catalog_read(
+        request, lambda source, session: source.stats.find_one({"_id": CATEGORY_STATS_ID}, session=session)
+    ) or {}
+    counts = {category: 0 for category in GEAR_CATEGORIES}
+    counts.update({category: n for category, n in stats.get("counts", {}).items() if n > 0})
+    return {"categories": counts, "total": sum(counts.values())}
+
+@app.get("/api/gears/changes")
+async def get_gear_changes(
+    request: Request,
+    since: Optional[str] = None,
+    limit: int = Query(GEARS_MAX_PAGE_SIZE, ge=1, le=GEARS_MAX_PAGE_SIZE),
+):
+    # Without `since` this pages through the live catalog. Clients upsert `changed`
+    # by id, drop `deleted`, store `cursor` and call again while `has_more`.
+    now = datetime.utcnow()
+    if since:
+        after, _ = decode_cursor(since)
+        if after < now - timedelta(seconds=TOMBSTONE_TTL_SECONDS):
+            raise HTTPException(status_code=410, detail="Cursor is older than tombstone retention, resync from scratch")
+        query = keyset_after(since, "updated_at")
+    else:
+        query = LIVE_GEARS
+    docs = await catalog_read(request, lambda source, session: (
+        source.gears.find(query, {"_id": 0, "deleted_at": 0}, session=session)
+        .sort([("updated_at", 1), ("id", 1)])
+        .limit(limit + 1)
+        .to_list(length=None)
+    ))
+
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    horizon = now - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+    if has_more:
+        cursor = encode_cursor(docs[-1], "updated_at")
+    elif docs and docs[-1]["updated_at"] <= horizon:
+        cursor = encode_cursor(docs[-1], "updated_at")
+    elif docs or not since:
+        # Records newer than the horizon are sent again next time; applying them is idempotent
+        cursor = encode_cursor({"updated_at": horizon, "id": ""}, "updated_at")
+    else:
+        cursor = since
+    body = json_body({
+        "changed": [doc for doc in docs if not doc.get("deleted")],
+        "deleted": [doc["id"] for doc in docs if doc.get("deleted")],
+        "cursor": cursor,
+        "has_more": has_more,
+    })
+    return Response(content=body, media_type="application/json")
 
 @app.post("/api/gears", response_model=Gear)
-async def create_gear(gear: GearBase, current_user: dict = Depends(get_current_user)):
+async def create_gear(gear: GearBase, response: Response, current_user: dict = Depends(get_current_user)):
     if current_user["role"] not in ["créateur", "responsable"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
     gear_data = gear.dict()
     gear_data["id"] = str(uuid.uuid4())
     gear_data["created_at"] = datetime.utcnow()
+    gear_data["updated_at"] = gear_data["created_at"]
     
-    await db.gears.insert_one(gear_data)
+    async with causal_session() as session:
+        try:
+            await db.gears.insert_one(gear_data, session=session)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="A gear with this gear_id already exists")
+        await inc_category_counts({gear_data["category"]: 1}, session=session)
+        set_causal_token(response, session)
+    catalog_cache.bump()
+    index_gear(gear_data)
+    publish_event("gear.created", gear_event_data(gear_data))
     return gear_data
 
 @app.put("/api/gears/{gear_id}")
-async def update_gear(gear_id: str, gear: GearBase, current_user: dict = Depends(get_current_user)):
+async def update_gear(gear_id: str, gear: GearBase, response: Response, current_user: dict = Depends(get_current_user)):
     if current_user["role"] not in ["créateur", "responsable"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    result = await db.gears.update_one(
-        {"id": gear_id},
-        {"$set": gear.dict()}
-    )
-    
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Gear not found")
-    
+    fields = gear.dict()
+    now = datetime.utcnow()
+    async with causal_session() as session:
+        try:
+            previous = await db.gears.find_one_and_update(
+                {"id": gear_id, **LIVE_GEARS},
+                {"$set": {**fields, "updated_at": now}},
+                return_document=ReturnDocument.BEFORE,
+                session=session,
+            )
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="A gear with this gear_id already exists")
+        
+        if previous is None:
+            raise HTTPException(status_code=404, detail="Gear not found")
+        
+        updated = {**previous, **fields, "updated_at": now}
+        if previous.get("category") != updated["category"]:
+            await inc_category_counts({previous.get("category"): -1, updated["category"]: 1}, session=session)
+        set_causal_token(response, session)
+    catalog_cache.bump()
+    index_gear(updated)
+    changed = {field: value for field, value in fields.items() if previous.get(field) != value}
+    if changed:
+        publish_event("gear.updated", {"id": gear_id, **changed, "updated_at": now})
     return {"message": "Gear updated successfully"}
 
 @app.delete("/api/gears/{gear_id}")
-async def delete_gear(gear_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_gear(gear_id: str, response: Response, current_user: dict = Depends(get_current_user)):
     if current_user["role"] not in ["créateur", "responsable"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    result = await db.gears.delete_one({"id": gear_id})
-    
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Gear not found")
-    
+    now = datetime.utcnow()
+    async with causal_session() as session:
+        deleted = await db.gears.find_one_and_update(
+            {"id": gear_id, **LIVE_GEARS},
+            tombstone(now),
+            projection={"category": 1},
+            session=session,
+        )
+        
+        if deleted is None:
+            raise HTTPException(status_code=404, detail="Gear not found")
+        
+        await inc_category_counts({deleted.get("category"): -1}, session=session)
+        set_causal_token(response, session)
+    catalog_cache.bump()
+    unindex_gear(gear_id)
+    publish_event("gear.deleted", {"id": gear_id})
     return {"message": "Gear deleted successfully"}
 
+async def ndjson_lines(request: Request):
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    yield buffer
+
+def index_gear(gear: dict):
+    gear_prefix_index.add(gear)
+    name_index.add(("gear", gear["id"]), gear.get("name") or "")
+
+def unindex_gear(gid: str):
+    gear_prefix_index.remove(gid)
+    name_index.remove(("gear", gid))
+
+async def rebuild_gear_indexes():
+    projection = {field: 1 for field in SUGGEST_FIELDS}
+    gears = await db.gears.find(LIVE_GEARS, projection).to_list(length=None)
+    gear_prefix_index.build(gears)
+    name_index.clear()
+    for gear in gears:
+        name_index.add(("gear", gear["id"]), gear.get("name") or "")
+    await rebuild_suggestion_names()
+
+async def rebuild_suggestion_names():
+    # Suggestion writes leave the catalog and the gear names untouched
+    for key in name_index.keys():
+        if key[0] == "suggestion":
+            name_index.remove(key)
+    async for suggestion in db.suggestions.find({"status": "pending"}, {"_id": 0, "id": 1, "name": 1}):
+        name_index.add(("suggestion", suggestion["id"]), suggestion.get("name") or "")
+
+@app.post("/api/gears/bulk")
+async def bulk_import_gears(request: Request, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["créateur", "responsable"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    
+    report = {"inserted": 0, "updated": 0, "error_count": 0, "errors": []}
+    # gear_id -> (line number, fields)
+    batch = {}
+
+    def add_error(line_number: int, error: str):
+        report["error_count"] += 1
+        if len(report["errors"]) < BULK_MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_number, "error": error})
+
+    async def flush():
+        if not batch:
+            return
+        now = datetime.utcnow()
+        entries = list(batch.values())
+        operations = [
+            UpdateOne(
+                {"gear_id": gear_id},
+                {"$set": {**fields, "updated_at": now}, "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": now}},
+                upsert=True,
+            )
+            for gear_id, (_, fields) in batch.items()
+        ]
+        batch.clear()
+        try:
+            result = await db.gears.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything but the failed operations was applied
+            report["inserted"] += e.details.get("nUpserted", 0)
+            report["updated"] += e.details.get("nMatched", 0)
+            for error in e.details.get("writeErrors", []):
+                add_error(entries[error["index"]][0], error.get("errmsg", "Write failed"))
+            return
+        report["inserted"] += result.upserted_count
+        report["updated"] += result.matched_count
+
+    try:
+        line_number = 0
+        async for line in ndjson_lines(request):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                gear = GearBase(**json.loads(line))
+            except (ValueError, TypeError) as e:
+                add_error(line_number, str(e))
+                continue
+            # Last line wins when a gear_id repeats within a batch
+            batch[gear.gear_id] = (line_number, gear.dict())
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush()
+        await flush()
+    finally:
+        # Batches already written stay written, even if a later one failed
+        if report["inserted"] or report["updated"]:
+            # Upserts can move gears between categories, so recount instead of $inc
+            await reconcile_category_counts()
+            catalog_cache.bump()
+            await rebuild_gear_indexes()
+            # Too many changes to diff; clients reload the catalog
+            publish_event("catalog.reloaded", {"inserted": report["inserted"], "updated": report["updated"]})
+    return report
+
+@app.get("/api/gears/export")
+async def export_gears(category: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    query = {"category": category, **LIVE_GEARS} if category else LIVE_GEARS
+    gears_cursor = catalog_db.gears.find(query, {"_id": 0}).sort([("created_at", 1), ("id", 1)]).batch_size(BULK_BATCH_SIZE)
+    return StreamingResponse(stream_documents(gears_cursor, ndjson=True), media_type=NDJSON_MEDIA_TYPE)
+
+def client_ip(request: Request) -> str:
+    # The client controls every entry left of what our own proxies appended,
+    # so count hops from the right
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",") if entry.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+async def suggestion_admission(request: Request):
+    # Per-client token buckets, then a global cap on concurrent writes
+    global suggestion_writes_in_flight
+    keys = [f"suggest:ip:{client_ip(request)}"]
+    fingerprint = request.headers.get("x-client-fingerprint")
+    if fingerprint:
+        keys.append(f"suggest:fp:{fingerprint[:128]}")
+    retry_after = await suggestion_limiter.check(*keys)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many suggestions, slow down",
+                            headers={"Retry-After": retry_after_header(retry_after)})
+    if suggestion_writes_in_flight >= SUGGESTION_MAX_IN_FLIGHT:
+        raise HTTPException(status_code=429, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+    suggestion_writes_in_flight += 1
+    try:
+        yield
+    finally:
+        suggestion_writes_in_flight -= 1
+
 # Suggestion endpoints
-@app.post("/api/suggestions", response_model=GearSuggestion)
+@app.post("/api/suggestions", response_model=GearSuggestion, dependencies=[Depends(suggestion_admission)])
 async def create_suggestion(suggestion: GearBase):
+    if await db.gears.find_one({"gear_id": suggestion.gear_id}, {"_id": 1}):
+        raise HTTPException(status_code=409, detail="This gear is already in the catalog")
+    
     suggestion_data = suggestion.dict()
+    # Only the gear_id is a hard duplicate; a similar name is flagged for the moderators
+    similar = name_index.find(suggestion.name)
+    suggestion_data["similar_to"] = None if similar is None else {
+        "kind": similar[0][0], "id": similar[0][1], "score": round(similar[1], 2),
+    }
     suggestion_data["id"] = str(uuid.uuid4())
-    suggestion_data["created_at"] = datetime.utcnow()
+    suggestion_data["created_at"] = suggestion_data["updated_at"] = datetime.utcnow()
     suggestion_data["status"] = "pending"
     
-    await db.suggestions.insert_one(suggestion_data)
+    try:
+        await db.suggestions.insert_one(suggestion_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="A suggestion for this gear is already pending")
+    name_index.add(("suggestion", suggestion_data["id"]), suggestion_data["name"])
+    publish_event("suggestion.created", suggestion_event_data(suggestion_data), moderation=True)
     return suggestion_data
 
 @app.get("/api/suggestions", response_model=List[GearSuggestion])
-async def get_suggestions(current_user: dict = Depends(get_current_user)):
+async def get_suggestions(
+    request: Request,
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=GEARS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
     if current_user["role"] not in ["créateur", "responsable", "modérateur"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    suggestions = []
-    async for suggestion in db.suggestions.find():
-        suggestion["_id"] = str(suggestion["_id"])
-        suggestions.append(suggestion)
-    return suggestions
+    conditions = []
+    if status:
+        conditions.append({"status": status})
+    if cursor:
+        conditions.append(keyset_after(cursor))
+    query = {"$and": conditions} if conditions else {}
+    
+    suggestions_cursor = db.suggestions.find(query, {"_id": 0}).sort([("created_at", 1), ("id", 1)])
+    if wants_ndjson(request):
+        if limit:
+            suggestions_cursor = suggestions_cursor.limit(limit)
+        return streaming_list_response(request, suggestions_cursor)
+    
+    # Answered from two index lookups, so an unchanged list costs neither the read nor the hashing
+    headers = {
+        "ETag": await suggestions_etag({"status": status} if status else {}, (status, limit, cursor)),
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if limit:
+        suggestions_cursor = suggestions_cursor.limit(limit + 1)
+    suggestions = await suggestions_cursor.to_list(length=None)
+    
+    if limit and len(suggestions) > limit:
+        suggestions = suggestions[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(suggestions[-1])
+    return Response(content=json_body(suggestions), media_type="application/json", headers=headers)
 
-@app.put("/api/suggestions/{suggestion_id}/approve")
-async def approve_suggestion(suggestion_id: str, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] not in ["créateur", "responsable"]:
+async def suggestions_etag(query: dict, params: tuple) -> str:
+    # Every suggestion write sets updated_at. Inserts raise the newest updated_at and
+    # status changes raise it (into a filter) or lower the count (out of one)
+    latest, count = await asyncio.gather(
+        db.suggestions.find(query, {"_id": 0, "updated_at": 1}).sort("updated_at", -1).limit(1).to_list(length=1),
+        db.suggestions.count_documents(query),
+    )
+    newest = latest[0].get("updated_at") if latest else None
+    validator = repr((newest.isoformat() if newest else None, count, params))
+    return '"s%s"' % hashlib.sha256(validator.encode()).hexdigest()[:32]
+
+@app.get("/api/suggestions/counts")
+async def get_suggestion_counts(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["créateur", "responsable", "modérateur"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    # Get suggestion
-    suggestion = await db.suggestions.find_one({"id": suggestion_id})
-    if not suggestion:
-        raise HTTPException(status_code=404, detail="Suggestion not found")
-    
-    # Create gear from suggestion
-    gear_data = {
-        "id": str(uuid.uuid4()),
+    # Each count is answered from the status_created_at index
+    counts = await asyncio.gather(*(
+        db.suggestions.count_documents({"status": status}) for status in SUGGESTION_STATUSES
+    ))
+    return dict(zip(SUGGESTION_STATUSES, counts))
+
+async def run_transactional(fn, *args):
+    # Runs fn(*args, session=...) in a transaction when the deployment supports it;
+    # returns fn's result and the causal token for the client's follow-up reads.
+    # with_transaction reruns fn on transient errors (e.g. a write conflict with a
+    # concurrent moderator), so fn must be safe to run again from the start
+    async with causal_session() as session:
+        if session is None:
+            return await fn(*args), None
+        result = await session.with_transaction(lambda s: fn(*args, session=s))
+        return result, causal_token(session)
+
+def gear_from_suggestion(suggestion: dict, gear_ref: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "id": gear_ref,
         "name": suggestion["name"],
         "nickname": suggestion["nickname"],
         "gear_id": suggestion["gear_id"],
         "image_url": suggestion["image_url"],
         "description": suggestion["description"],
         "category": suggestion["category"],
-        "created_at": datetime.utcnow()
+        "created_at": now,
+        "updated_at": now,
     }
+
+async def claim_and_approve(suggestion_id: str, session=None) -> Optional[dict]:
+    # Claiming flips pending -> approved in one atomic write, so concurrent
+    # approvals cannot both create a gear. The gear id is fixed at claim time,
+    # which lets a retry after a crash create the missing gear exactly once.
+    suggestion = await db.suggestions.find_one_and_update(
+        {"id": suggestion_id, "status": "pending"},
+        {"$set": {"status": "approved", "approved_gear_id": str(uuid.uuid4()), "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+    if suggestion is None:
+        suggestion = await db.suggestions.find_one({"id": suggestion_id}, session=session)
+        if suggestion is None:
+            raise HTTPException(status_code=404, detail="Suggestion not found")
+        if suggestion["status"] != "approved":
+            raise HTTPException(status_code=409, detail=f"Suggestion already {suggestion['status']}")
+        if "approved_gear_id" not in suggestion:
+            return None
+        if await db.gears.find_one({"id": suggestion["approved_gear_id"]}, {"_id": 1}, session=session):
+            return None
     
-    await db.gears.insert_one(gear_data)
+    gear_data = gear_from_suggestion(suggestion, suggestion["approved_gear_id"])
+    await db.gears.insert_one(gear_data, session=session)
+    await inc_category_counts({gear_data["category"]: 1}, session=session)
+    return gear_data
+
+@app.put("/api/suggestions/{suggestion_id}/approve")
+async def approve_suggestion(suggestion_id: str, response: Response, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["créateur", "responsable"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    # Update suggestion status
-    await db.suggestions.update_one(
-        {"id": suggestion_id},
-        {"$set": {"status": "approved"}}
-    )
+    try:
+        gear_data, token = await run_transactional(claim_and_approve, suggestion_id)
+    except DuplicateKeyError as e:
+        if "id" in ((e.details or {}).get("keyPattern") or {}):
+            # A concurrent retry of the same approval inserted the gear first
+            name_index.remove(("suggestion", suggestion_id))
+            return {"message": "Suggestion already approved", "gear": None}
+        # Another gear already has this gear_id: the suggestion is a duplicate
+        await db.suggestions.update_one(
+            {"id": suggestion_id, "status": {"$in": ["pending", "approved"]}},
+            {
+                "$set": {"status": "rejected", "rejected_reason": "duplicate", "updated_at": datetime.utcnow()},
+                "$unset": {"approved_gear_id": ""},
+            },
+        )
+        name_index.remove(("suggestion", suggestion_id))
+        publish_event("suggestion.status_changed", {"id": suggestion_id, "status": "rejected"}, moderation=True)
+        raise HTTPException(status_code=409, detail="A gear with this gear_id already exists")
+    name_index.remove(("suggestion", suggestion_id))
+    if token:
+        response.headers["X-Causal-Token"] = token
+    
+    if gear_data is None:
+        return {"message": "Suggestion already approved", "gear": None}
     
-    return {"message": "Suggestion approved and gear created"}
+    catalog_cache.bump()
+    index_gear(gear_data)
+    publish_event("suggestion.status_changed", {"id": suggestion_id, "status": "approved"}, moderation=True)
+    publish_event("gear.created", gear_event_data(gear_data))
+    return {"message": "Suggestion approved and gear created", "gear": gear_event_data(gear_data)}
 
 @app.put("/api/suggestions/{suggestion_id}/reject")
 async def reject_suggestion(suggestion_id: str, current_user: dict = Depends(get_current_user)):
@@ -269,32 +1424,300 @@ async def reject_suggestion(suggestion_id: str, current_user: dict = Depends(get
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
     result = await db.suggestions.update_one(
-        {"id": suggestion_id},
-        {"$set": {"status": "rejected"}}
+        {"id": suggestion_id, "status": {"$ne": "rejected"}},
+        {"$set": {"status": "rejected", "updated_at": datetime.utcnow()}}
     )
     
-    if result.matched_count == 0:
+    # Rejecting twice leaves updated_at, and so the list validator, alone
+    if result.matched_count == 0 and not await db.suggestions.find_one({"id": suggestion_id}, {"_id": 1}):
         raise HTTPException(status_code=404, detail="Suggestion not found")
     
+    name_index.remove(("suggestion", suggestion_id))
+    if result.modified_count:
+        publish_event("suggestion.status_changed", {"id": suggestion_id, "status": "rejected"}, moderation=True)
     return {"message": "Suggestion rejected"}
 
+async def moderate_batch(ids: List[str], action: str, session=None) -> dict:
+    results = {}
+    pending = []
+    async for suggestion in db.suggestions.find({"id": {"$in": ids}}, {"_id": 0}, session=session):
+        if suggestion["status"] == "pending":
+            pending.append(suggestion)
+        else:
+            results[suggestion["id"]] = f"already_{suggestion['status']}"
+    for suggestion_id in ids:
+        results.setdefault(suggestion_id, "not_found")
+    if not pending:
+        return {"results": results, "gears": []}
+    
+    now = datetime.utcnow()
+    # Marks the rejections this call made, as approved_gear_id does for approvals
+    batch_ref = str(uuid.uuid4())
+    if action == "reject":
+        await db.suggestions.bulk_write([
+            UpdateOne(
+                {"id": s["id"], "status": "pending"},
+                {"$set": {"status": "rejected", "updated_at": now, "moderation_ref": batch_ref}},
+            )
+            for s in pending
+        ], ordered=False, session=session)
+        rejected = await rejected_by(batch_ref, [s["id"] for s in pending], session)
+        for s in pending:
+            results[s["id"]] = "rejected" if s["id"] in rejected else "conflict"
+        return {"results": results, "gears": []}
+    
+    # Suggestions whose gear_id is already in the catalog (or earlier in this batch)
+    # are rejected as duplicates in the same bulk write
+    cataloged = set()
+    async for gear in db.gears.find(
+        {"gear_id": {"$in": [s["gear_id"] for s in pending]}}, {"_id": 0, "gear_id": 1}, session=session
+    ):
+        cataloged.add(gear["gear_id"])
+    duplicates, approvable = [], []
+    for s in pending:
+        if s["gear_id"] in cataloged:
+            duplicates.append(s)
+        else:
+            cataloged.add(s["gear_id"])
+            approvable.append(s)
+    pending = approvable
+    
+    refs = {s["id"]: str(uuid.uuid4()) for s in pending}
+    operations = [
+        UpdateOne(
+            {"id": s["id"], "status": "pending"},
+            {"$set": {"status": "approved", "approved_gear_id": refs[s["id"]], "updated_at": now}},
+        )
+        for s in pending
+    ] + [
+        UpdateOne(
+            {"id": s["id"], "status": "pending"},
+            {"$set": {"status": "rejected", "rejected_reason": "duplicate", "updated_at": now, "moderation_ref": batch_ref}},
+        )
+        for s in duplicates
+    ]
+    await db.suggestions.bulk_write(operations, ordered=False, session=session)
+    if duplicates:
+        rejected = await rejected_by(batch_ref, [s["id"] for s in duplicates], session)
+        for s in duplicates:
+            results[s["id"]] = "duplicate" if s["id"] in rejected else "conflict"
+    if not pending:
+        return {"results": results, "gears": []}
+    # Only claims carrying our gear id were won; the rest were handled concurrently
+    won = set()
+    async for claimed in db.suggestions.find(
+        {"id": {"$in": list(refs)}, "approved_gear_id": {"$in": list(refs.values())}},
+        {"_id": 0, "id": 1},
+        session=session,
+    ):
+        won.add(claimed["id"])
+    
+    gears = [gear_from_suggestion(s, refs[s["id"]]) for s in pending if s["id"] in won]
+    if gears:
+        await db.gears.insert_many(gears, ordered=False, session=session)
+        deltas = {}
+        for gear_data in gears:
+            deltas[gear_data["category"]] = deltas.get(gear_data["category"], 0) + 1
+        await inc_category_counts(deltas, session=session)
+    for s in pending:
+        results[s["id"]] = "approved" if s["id"] in won else "conflict"
+    return {"results": results, "gears": gears}
+
+async def rejected_by(batch_ref: str, ids: List[str], session=None) -> set:
+    # Suggestions read as pending but handled concurrently did not get our marker
+    rejected = set()
+    async for suggestion in db.suggestions.find(
+        {"id": {"$in": ids}, "moderation_ref": batch_ref}, {"_id": 0, "id": 1}, session=session
+    ):
+        rejected.add(suggestion["id"])
+    return rejected
+
+# Batch results that changed a suggestion's status
+BATCH_RESULT_STATUS = {"approved": "approved", "rejected": "rejected", "duplicate": "rejected"}
+
+@app.post("/api/suggestions/batch")
+async def batch_moderate_suggestions(batch: BatchModerationRequest, response: Response, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["créateur", "responsable"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    if batch.action not in ["approve", "reject"]:
+        raise HTTPException(status_code=400, detail="Action must be 'approve' or 'reject'")
+    if len(batch.ids) > MODERATION_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MODERATION_MAX_BATCH} suggestions per batch")
+    
+    ids = list(dict.fromkeys(batch.ids))
+    outcome, token = await run_transactional(moderate_batch, ids, batch.action)
+    if token:
+        response.headers["X-Causal-Token"] = token
+    
+    for suggestion_id in ids:
+        name_index.remove(("suggestion", suggestion_id))
+    if outcome["gears"]:
+        catalog_cache.bump()
+        for gear_data in outcome["gears"]:
+            index_gear(gear_data)
+    for suggestion_id in ids:
+        status = BATCH_RESULT_STATUS.get(outcome["results"][suggestion_id])
+        if status:
+            publish_event("suggestion.status_changed", {"id": suggestion_id, "status": status}, moderation=True)
+    for gear_data in outcome["gears"]:
+        publish_event("gear.created", gear_event_data(gear_data))
+    return {"results": [{"id": sid, "result": outcome["results"][sid]} for sid in ids]}
+
 @app.get("/api/users", response_model=List[dict])
-async def get_users(current_user: dict = Depends(get_current_user)):
+async def get_users(request: Request, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "créateur":
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    users = []
-    async for user in db.users.find():
-        user["_id"] = str(user["_id"])
-        user.pop("password_hash", None)  # Remove password hash from response
-        users.append(user)
-    return users
+    # Never send password hashes
+    users_cursor = db.users.find({}, {"_id": 0, "password_hash": 0})
+    return streaming_list_response(request, users_cursor)
+
+@app.get("/api/admin/db-pool")
+async def get_db_pool_metrics(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "créateur":
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return pool_metrics.snapshot()
+
+def runtime_gauges():
+    for name, value in pool_metrics.snapshot().items():
+        yield f"mongodb_pool_{name}", f"MongoDB connection pool {name.replace('_', ' ')}.", value
+    for name, value in password_hasher.stats().items():
+        yield f"password_hash_{name}", f"bcrypt pool {name.replace('_', ' ')}.", value
+    yield "catalog_cache_entries", "Entries in the catalog response cache.", len(catalog_cache)
+    yield "catalog_cache_version", "Catalog cache version, bumped on every gear write.", catalog_cache.version
+    yield "principal_cache_entries", "Entries in the authenticated principal cache.", len(principal_cache)
+    yield "suggestion_writes_in_flight", "Suggestion inserts currently running.", suggestion_writes_in_flight
+    yield "image_cache_entries", "Files in the image disk cache.", len(image_proxy.cache)
+    yield "image_cache_bytes", "Bytes in the image disk cache.", image_proxy.cache.size
+    yield "event_subscribers", "Clients connected to the event stream.", len(event_broker)
+    yield "event_subscribers_dropped", "Event stream clients disconnected for falling behind.", event_broker.dropped
+
+registry.add_collector(runtime_gauges)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    body = metrics_directory.render() if metrics_directory is not None else registry.render()
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/images/{gear_id}")
+async def get_gear_image(
+    request: Request,
+    gear_id: str,
+    w: int = IMAGE_DEFAULT_WIDTH,
+    format: Optional[str] = None,
+    v: Optional[str] = None,
+):
+    if w not in IMAGE_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"Width must be one of {', '.join(map(str, IMAGE_WIDTHS))}")
+    if format is None:
+        format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    if format not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail="Format must be 'webp' or 'jpeg'")
+    gear = await catalog_db.gears.find_one({"id": gear_id, **LIVE_GEARS}, {"_id": 0, "image_url": 1})
+    if gear is None or not gear.get("image_url"):
+        raise HTTPException(status_code=404, detail="Gear not found")
+    try:
+        data = await image_proxy.thumbnail(gear["image_url"], w, format)
+    except ImageError as e:
+        # The reason stays in the log: echoed back it would probe the network for the caller
+        logger.warning("Image for gear %s unavailable: %s", gear_id, e)
+        raise HTTPException(status_code=502, detail="Image unavailable")
+
+    headers = {
+        "ETag": '"%s"' % hashlib.sha256(data).hexdigest()[:32],
+        # A versioned URL (v derived from image_url) never changes content
+        "Cache-Control": "public, max-age=31536000, immutable" if v else "public, max-age=86400, stale-while-revalidate=604800",
+        "Vary": "Accept",
+    }
+    if headers["ETag"] in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=IMAGE_FORMATS[format][1], headers=headers)
+
+async def event_stream(request: Request, subscriber):
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield b": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            event_id, kind, payload = event
+            yield format_sse(event_id, kind, payload)
+            if kind == RESYNC:
+                return
+    finally:
+        event_broker.unsubscribe(subscriber)
+
+@app.post("/api/events/ticket")
+async def create_events_ticket(current_user: dict = Depends(get_current_user)):
+    # EventSource cannot send headers, so the stream URL carries this ticket instead
+    # of the access token: it expires quickly and opens nothing but the stream
+    ticket = create_access_token(
+        {"sub": current_user["username"], "purpose": "events"},
+        timedelta(seconds=EVENTS_TICKET_TTL_SECONDS),
+    )
+    return {"ticket": ticket, "expires_in": EVENTS_TICKET_TTL_SECONDS}
+
+@app.get("/api/events")
+async def stream_events(request: Request, ticket: Optional[str] = None, last_event_id: Optional[str] = None):
+    moderation = False
+    if ticket:
+        user = await user_from_token(ticket, purpose="events")
+        moderation = user["role"] in MODERATOR_ROLES
+    if draining:
+        raise HTTPException(status_code=503, detail="Shutting down", headers={"Retry-After": "1"})
+    if len(event_broker) >= EVENTS_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many event stream clients", headers={"Retry-After": "5"})
+    # Clients reconnecting with a new ticket open a new EventSource and pass the id themselves
+    subscriber = event_broker.subscribe(moderation, request.headers.get("last-event-id") or last_event_id)
+    return StreamingResponse(
+        event_stream(request, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def begin_drain():
+    global draining
+    draining = True
+    event_broker.close_all()
+
+async def missing_indexes() -> List[str]:
+    missing = []
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        missing.extend(f"{collection}.{index.document['name']}" for index in indexes if index.document["name"] not in existing)
+    return missing
+
+@app.get("/api/health/live", include_in_schema=False)
+async def liveness():
+    # Answering at all means the event loop is serving requests
+    return {"status": "alive"}
+
+@app.get("/api/health/ready", include_in_schema=False)
+async def readiness():
+    if draining:
+        return Response(content=json_body({"status": "draining"}), status_code=503, media_type="application/json")
+    try:
+        await db.command("ping")
+        missing = await missing_indexes()
+    except PyMongoError as e:
+        return Response(content=json_body({"status": "unavailable", "error": str(e)}), status_code=503, media_type="application/json")
+    if missing:
+        return Response(content=json_body({"status": "missing_indexes", "missing": missing}), status_code=503, media_type="application/json")
+    return {"status": "ready"}
 
 @app.get("/api/me")
 async def get_current_user_info(current_user: dict = Depends(get_current_user)):
-    current_user.pop("password_hash", None)
     return current_user
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # Multi-worker production server; see serve.py
+    import serve
+    serve.main()
\ No newline at end of file
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Load-testing and benchmark harness for Roblox Gear Hub
+Seeds a synthetic catalog, drives concurrent load against the API and
+stores latency/throughput/RSS results as JSON for run-to-run comparison.
+
+Examples:
+    # In-process app against a throwaway mongomock database
+    python backend_benchmark.py --mongomock --gears 10000
+
+    # In-process app against a local MongoDB (database roblox_gear_hub_bench)
+    python backend_benchmark.py --gears 100000 --concurrency 64
+
+    # Already running server; gears and suggestions are seeded through its API
+    python backend_benchmark.py --base-url http://localhost:8001 --gears 100000
+
+    # Compare with an earlier run
+    python backend_benchmark.py --mongomock --compare bench_results/previous.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+from pymongo import ReplaceOne
+
+ROOT_USERNAME = "root"
+ROOT_PASSWORD = "Mouse123890!"
+CATEGORIES = ["joueurs", "modérateur", "événements", "interdits"]
+WORDS = [
+    "épée", "bâton", "lance", "bouclier", "éclair", "dragon", "feu", "glace", "ombre", "légendaire",
+    "sword", "staff", "launcher", "rocket", "magic", "ancient", "golden", "shadow", "storm", "crystal",
+]
+SCENARIOS = ["login", "list", "search", "suggest", "approve"]
+GEAR_FIELDS = ("name", "nickname", "gear_id", "image_url", "description", "category")
+
+
+def synthetic_gear(i: int, base_time: datetime) -> dict:
+    rng = random.Random(i)
+    name = " ".join(rng.choice(WORDS) for _ in range(3)).title() + f" {i}"
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "name": name,
+        "nickname": " ".join(rng.choice(WORDS) for _ in range(2)).title(),
+        "gear_id": str(10_000_000 + i),
+        "image_url": f"https://assetdelivery.roblox.com/v1/asset/?id={10_000_000 + i}",
+        "description": " ".join(rng.choice(WORDS) for _ in range(12)),
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "created_at": base_time + timedelta(milliseconds=i),
+    }
+
+
+async def seed(db, gears: int, suggestions: int, batch_size: int = 5000):
+    """Replaces the benchmark database content with a synthetic catalog.
+
+    Earlier gears are tombstoned rather than deleted, like the app does, and the
+    synthetic ones (same ids every run) are upserted over them.
+    """
+    from server import LIVE_GEARS, tombstone
+
+    now = datetime.utcnow()
+    await db.gears.update_many(LIVE_GEARS, tombstone(now))
+    await db.suggestions.update_many({"status": "pending"}, {"$set": {"status": "rejected", "updated_at": now}})
+    base_time = now - timedelta(days=30)
+    started = time.perf_counter()
+    for start in range(0, gears, batch_size):
+        batch = ({**synthetic_gear(i, base_time), "updated_at": now} for i in range(start, min(start + batch_size, gears)))
+        await db.gears.bulk_write([ReplaceOne({"id": gear["id"]}, gear, upsert=True) for gear in batch], ordered=False)
+    suggestion_ids = []
+    pending = []
+    for i in range(gears, gears + suggestions):
+        suggestion = {**synthetic_gear(i, base_time), "status": "pending", "updated_at": now}
+        suggestion_ids.append(suggestion["id"])
+        pending.append(ReplaceOne({"id": suggestion["id"]}, suggestion, upsert=True))
+    if pending:
+        await db.suggestions.bulk_write(pending, ordered=False)
+    print(f"Seeded {gears} gears and {suggestions} pending suggestions in {time.perf_counter() - started:.1f}s")
+    return suggestion_ids
+
+
+async def login(client) -> dict:
+    response = await client.post("/api/auth/login", json={"username": ROOT_USERNAME, "password": ROOT_PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def seed_through_api(client, gears: int, suggestions: int, batch_size: int = 5000):
+    """Seeds a running server through its own endpoints, whatever database it uses.
+
+    Gears are upserted by gear_id with the bulk import, which also refreshes the
+    counters, cache and typeahead on every worker. Suggestions go through the
+    public endpoint and its rate limit; seeding stops at the first 429.
+    """
+    auth = await login(client)
+    base_time = datetime.utcnow() - timedelta(days=30)
+    started = time.perf_counter()
+
+    async def lines():
+        for start in range(0, gears, batch_size):
+            chunk = (synthetic_gear(i, base_time) for i in range(start, min(start + batch_size, gears)))
+            yield "".join(json.dumps({field: gear[field] for field in GEAR_FIELDS}) + "\n" for gear in chunk).encode()
+
+    response = await client.post(
+        "/api/gears/bulk", content=lines(), timeout=None,
+        headers={**auth, "Content-Type": "application/x-ndjson"},
+    )
+    response.raise_for_status()
+    report = response.json()
+    if report["error_count"]:
+        print(f"Bulk import reported {report['error_count']} errors, first: {report['errors'][:1]}")
+
+    # Fresh gear_ids each run: earlier runs' suggestions were approved into the catalog
+    run_base = 20_000_000 + int(time.time()) % 1_000_000 * 1000
+    suggestion_ids = []
+    for i in range(suggestions):
+        suggestion = {field: synthetic_gear(gears + i, base_time)[field] for field in GEAR_FIELDS}
+        suggestion["gear_id"] = str(run_base + i)
+        response = await client.post("/api/suggestions", json=suggestion)
+        if response.status_code == 429:
+            print(f"Suggestions rate limited after {i}; raise SUGGESTION_BURST on the server to seed more")
+            break
+        response.raise_for_status()
+        suggestion_ids.append(response.json()["id"])
+    print(f"Seeded {report['inserted'] + report['updated']} gears and {len(suggestion_ids)} pending "
+          f"suggestions through the API in {time.perf_counter() - started:.1f}s")
+    return suggestion_ids
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_scenario(client, name, request_factory, requests_count, concurrency):
+    latencies = []
+    errors = {}
+    counter = iter(range(requests_count))
+
+    async def worker():
+        for n in counter:
+            method, url, kwargs = request_factory(n)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if not (isinstance(status, int) and status < 400):
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    result = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": percentile(latencies, 0.50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 0.95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else None,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else None,
+        "rss_mb": rss_mb(),
+    }
+    print(f"{name:8s} {result['requests']:6d} req  {result['throughput_rps'] or 0:9.1f} req/s  "
+          f"p50 {result['p50_ms'] or 0:8.2f} ms  p95 {result['p95_ms'] or 0:8.2f} ms  "
+          f"p99 {result['p99_ms'] or 0:8.2f} ms  errors {sum(errors.values())}")
+    return result
+
+
+async def drive(client, args, suggestion_ids):
+    auth = await login(client)
+    rng = random.Random(args.seed)
+
+    factories = {
+        "login": lambda n: ("POST", "/api/auth/login", {"json": {"username": ROOT_USERNAME, "password": ROOT_PASSWORD}}),
+        "list": lambda n: ("GET", "/api/gears", {"params": {"category": CATEGORIES[n % len(CATEGORIES)], "limit": args.page_size}}),
+        "search": lambda n: ("GET", "/api/gears/search", {"params": {"q": rng.choice(WORDS)}}),
+        "suggest": lambda n: ("GET", "/api/gears/suggest", {"params": {"prefix": rng.choice(WORDS)[:3]}}),
+        "approve": lambda n: ("PUT", f"/api/suggestions/{suggestion_ids[n]}/approve", {"headers": auth}),
+    }
+    results = {}
+    for name in args.scenarios:
+        if name == "search" and args.mongomock:
+            print(f"{name:8s} skipped: mongomock has no $text search")
+            results[name] = {"unsupported": "mongomock has no $text search"}
+            continue
+        count = args.requests
+        if name == "approve":
+            count = min(count, len(suggestion_ids))
+        elif name == "login":
+            # bcrypt bounds login throughput; keep the run short
+            count = min(count, args.login_requests)
+        results[name] = await run_scenario(client, name, factories[name], count, args.concurrency)
+    return results
+
+
+async def run(args):
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout, limits=limits) as client:
+            suggestion_ids = await seed_through_api(client, args.gears, args.suggestions)
+            return await drive(client, args, suggestion_ids)
+
+    # The seed wipes the database, so it is always the one named on the command line
+    os.environ["MONGODB_DB_NAME"] = args.db_name
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+    import database
+
+    if args.mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+        mongo_client = AsyncMongoMockClient()
+    else:
+        mongo_client = database.create_client()
+    db = mongo_client[database.DB_NAME]
+    suggestion_ids = await seed(db, args.gears, args.suggestions)
+
+    import server
+
+    server.create_client = lambda: mongo_client
+    if args.mongomock:
+        # mongomock has no hello command, sessions or read preferences
+        async def no_transactions():
+            return False
+
+        server.detect_transaction_support = no_transactions
+        type(db).with_options = lambda self, **kwargs: self
+    async with server.lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout, limits=limits) as client:
+            return await drive(client, args, suggestion_ids)
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nComparison with {baseline_path}")
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        deltas = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if result.get(key) and previous.get(key):
+                deltas.append(f"{key} {(result[key] - previous[key]) / previous[key] * 100:+.1f}%")
+        print(f"{name:8s} " + "  ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gears", type=int, default=10_000, help="synthetic catalog size (10k-1M)")
+    parser.add_argument("--suggestions", type=int, default=500, help="pending suggestions seeded for the approve scenario")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=200, help="cap on login requests")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--mongomock", action="store_true", help="use an in-memory mongomock stand-in (in-process only)")
+    parser.add_argument("--db-name", default="roblox_gear_hub_bench",
+                        help="database that gets wiped and seeded in-process; its name must contain 'bench'")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1667)
+    parser.add_argument("--output", help="results file (default bench_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    args = parser.parse_args()
+    if args.mongomock and args.base_url:
+        parser.error("--mongomock only applies to the in-process app")
+    if not args.base_url and "bench" not in args.db_name:
+        parser.error(f"refusing to wipe {args.db_name!r}: the benchmark database name must contain 'bench'")
+
+    scenarios = asyncio.run(run(args))
+    results = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "scenarios": scenarios,
+    }
+    output = args.output or os.path.join("bench_results", datetime.utcnow().strftime("%Y%m%dT%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ Tests authentication, gear management, and suggestions system
 import requests
 import json
 import sys
+import time
+import uuid
 from datetime import datetime
 
 # Backend URL from frontend/.env
@@ -16,6 +18,10 @@ BACKEND_URL = "https://ff1d7d13-cb43-4f20-9a14-68c410ec56f9.preview.emergentagen
 ROOT_USERNAME = "root"
 ROOT_PASSWORD = "Mouse123890!"
 
+# Unique per run so repeated runs do not collide with seeded or earlier test data
+RUN_ID = uuid.uuid4().hex[:8]
+RUN_GEAR_ID = int(time.time() * 1000)
+
 class TestResults:
     def __init__(self):
         self.passed = 0
@@ -160,9 +166,9 @@ def test_gear_management(auth_token):
     # Test 2: Create a new gear (requires responsable+ role)
     try:
         new_gear = {
-            "name": "Test Sword",
+            "name": f"Test Sword {RUN_ID}",
             "nickname": "TestSword",
-            "gear_id": "123456789",
+            "gear_id": str(RUN_GEAR_ID),
             "image_url": "https://tr.rbxcdn.com/test-image.png",
             "description": "A test sword for testing purposes",
             "category": "joueurs"
@@ -248,9 +254,9 @@ def test_suggestions_system(auth_token):
     # Test 1: Submit suggestion (public endpoint - no auth required)
     try:
         suggestion_data = {
-            "name": "Lightning Bolt",
+            "name": f"Lightning Bolt {RUN_ID}",
             "nickname": "LightBolt",
-            "gear_id": "987654321",
+            "gear_id": str(RUN_GEAR_ID + 1),
             "image_url": "https://tr.rbxcdn.com/lightning-bolt.png",
             "description": "A powerful lightning bolt gear",
             "category": "événements"
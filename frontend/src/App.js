@@ -1,6 +1,27 @@
-import React, { useState, useEffect, createContext, useContext } from 'react';
+import React, { useState, useEffect, useRef, createContext, useContext } from 'react';
 import './App.css';
 
+// Token from our last catalog write; sent with catalog reads so replicas return our own changes
+let causalToken = null;
+
+const rememberCausalToken = (response) => {
+  const token = response.headers.get('X-Causal-Token');
+  if (token) causalToken = token;
+};
+
+const catalogHeaders = () => (causalToken ? { 'X-Causal-Token': causalToken } : {});
+
+// The catalog is paged per category and searched on the server
+const GEARS_PAGE_SIZE = 60;
+const SEARCH_DEBOUNCE_MS = 250;
+
+// Thumbnail through the backend image proxy; v changes with image_url so the URL can be cached forever
+const gearImageUrl = (gear, width = 256) => {
+  let hash = 0;
+  for (const char of gear.image_url || '') hash = (hash * 31 + char.charCodeAt(0)) | 0;
+  return `${process.env.REACT_APP_BACKEND_URL}/api/images/${gear.id}?w=${width}&v=${(hash >>> 0).toString(36)}`;
+};
+
 // Context for authentication
 const AuthContext = createContext();
 
@@ -74,7 +95,12 @@ const copyToClipboard = (text) => {
 const App = () => {
   const [isDarkMode, setIsDarkMode] = useState(true);
   const [gears, setGears] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [searchResults, setSearchResults] = useState(null);
+  const [searchSuggestions, setSearchSuggestions] = useState([]);
+  const [categoryCounts, setCategoryCounts] = useState({});
   const [suggestions, setSuggestions] = useState([]);
+  const [suggestionCounts, setSuggestionCounts] = useState({ pending: 0, approved: 0, rejected: 0 });
   const [activeTab, setActiveTab] = useState('gears');
   const [selectedCategory, setSelectedCategory] = useState('joueurs');
   const [showSuggestionForm, setShowSuggestionForm] = useState(false);
@@ -89,6 +115,16 @@ const App = () => {
 
   const { user, login, logout, loading } = useAuth();
 
+  // Latest lists, read by the live-update handlers without re-subscribing
+  const gearsRef = useRef(gears);
+  const suggestionsRef = useRef(suggestions);
+  const selectedCategoryRef = useRef(selectedCategory);
+  gearsRef.current = gears;
+  suggestionsRef.current = suggestions;
+  selectedCategoryRef.current = selectedCategory;
+  // Created gears already counted, including those outside the loaded category
+  const createdGearIdsRef = useRef(new Set());
+
   // Suggestion form state
   const [suggestionForm, setSuggestionForm] = useState({
     name: '',
@@ -113,33 +149,130 @@ const App = () => {
     { id: 'interdits', name: 'Interdits', icon: '🚫', color: 'from-red-500 to-red-600' }
   ];
 
-  // Fetch gears
-  const fetchGears = async () => {
+  // Fetch one page of the selected category; the counts come from the stats endpoint
+  const fetchGearPage = async (cursor) => {
+    const category = selectedCategoryRef.current;
+    const params = new URLSearchParams({ category, limit: GEARS_PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/gears?${params}`, { headers: catalogHeaders() });
+    // The user switched category while this page was loading
+    if (!response.ok || category !== selectedCategoryRef.current) return null;
+    return { page: await response.json(), cursor: response.headers.get('X-Next-Cursor') };
+  };
+
+  const fetchStats = async () => {
     try {
-      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/gears`);
+      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/gears/stats`, { headers: catalogHeaders() });
       if (response.ok) {
-        const data = await response.json();
-        setGears(data);
+        const stats = await response.json();
+        setCategoryCounts(stats.categories);
+      }
+    } catch (error) {
+      console.error('Error fetching gear stats:', error);
+    }
+  };
+
+  const fetchGears = async () => {
+    try {
+      const [result] = await Promise.all([fetchGearPage(null), fetchStats()]);
+      if (result) {
+        setGearList(result.page);
+        setNextCursor(result.cursor);
       }
     } catch (error) {
       console.error('Error fetching gears:', error);
     }
   };
 
+  const fetchMoreGears = async () => {
+    try {
+      const result = await fetchGearPage(nextCursor);
+      if (result) {
+        // Gears created since the first page may already be in the list
+        const known = new Set(gearsRef.current.map(g => g.id));
+        setGearList([...gearsRef.current, ...result.page.filter(g => !known.has(g.id))]);
+        setNextCursor(result.cursor);
+      }
+    } catch (error) {
+      console.error('Error fetching gears:', error);
+    }
+  };
+
+  // Deltas, applied both for our own writes and for server-sent events; each is a no-op when already applied
+  const bumpCategory = (category, n) => {
+    setCategoryCounts(counts => ({ ...counts, [category]: (counts[category] || 0) + n }));
+  };
+
+  const setGearList = (next) => {
+    gearsRef.current = next;
+    setGears(next);
+  };
+
+  // Only the selected category is loaded: changes to other gears just move the counts
+  const applyGearCreated = (gear) => {
+    if (createdGearIdsRef.current.has(gear.id) || gearsRef.current.some(g => g.id === gear.id)) return;
+    createdGearIdsRef.current.add(gear.id);
+    if (gear.category === selectedCategoryRef.current) setGearList([...gearsRef.current, gear]);
+    bumpCategory(gear.category, 1);
+  };
+
+  const applyGearUpdated = (changes) => {
+    const previous = gearsRef.current.find(g => g.id === changes.id);
+    if (!previous) {
+      // A gear we never loaded may have moved into or out of a category
+      if (changes.category) fetchStats();
+      return;
+    }
+    if (changes.category && changes.category !== previous.category) {
+      setGearList(gearsRef.current.filter(g => g.id !== changes.id));
+      bumpCategory(previous.category, -1);
+      bumpCategory(changes.category, 1);
+      return;
+    }
+    setGearList(gearsRef.current.map(g => (g.id === changes.id ? { ...g, ...changes } : g)));
+  };
+
+  const applyGearDeleted = (gearId) => {
+    const previous = gearsRef.current.find(g => g.id === gearId);
+    if (!previous) {
+      fetchStats();
+      return;
+    }
+    setGearList(gearsRef.current.filter(g => g.id !== gearId));
+    bumpCategory(previous.category, -1);
+  };
+
+  const applySuggestionCreated = (suggestion) => {
+    if (suggestionsRef.current.some(s => s.id === suggestion.id)) return;
+    suggestionsRef.current = [...suggestionsRef.current, suggestion];
+    setSuggestions(suggestionsRef.current);
+    setSuggestionCounts(counts => ({ ...counts, pending: counts.pending + 1 }));
+  };
+
+  const applySuggestionStatus = (suggestionId, status) => {
+    if (!suggestionsRef.current.some(s => s.id === suggestionId)) return;
+    suggestionsRef.current = suggestionsRef.current.filter(s => s.id !== suggestionId);
+    setSuggestions(suggestionsRef.current);
+    setSuggestionCounts(counts => ({ ...counts, pending: counts.pending - 1, [status]: (counts[status] || 0) + 1 }));
+  };
+
   // Fetch suggestions
   const fetchSuggestions = async () => {
     if (!user) return;
     
     try {
-      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/suggestions`, {
-        headers: {
-          'Authorization': `Bearer ${user.token}`
-        }
-      });
+      const headers = { 'Authorization': `Bearer ${user.token}` };
+      const [response, countsResponse] = await Promise.all([
+        fetch(`${process.env.REACT_APP_BACKEND_URL}/api/suggestions?status=pending`, { headers }),
+        fetch(`${process.env.REACT_APP_BACKEND_URL}/api/suggestions/counts`, { headers })
+      ]);
       if (response.ok) {
         const data = await response.json();
         setSuggestions(data);
       }
+      if (countsResponse.ok) {
+        setSuggestionCounts(await countsResponse.json());
+      }
     } catch (error) {
       console.error('Error fetching suggestions:', error);
     }
@@ -219,9 +352,13 @@ const App = () => {
       });
 
       if (response.ok) {
+        rememberCausalToken(response);
+        const data = await response.json();
         alert('Suggestion approuvée !');
-        fetchSuggestions();
-        fetchGears();
+        applySuggestionStatus(suggestionId, 'approved');
+        // Approved earlier: the gear is already in the catalog, just not necessarily in our list
+        if (data.gear) applyGearCreated(data.gear);
+        else fetchGears();
       }
     } catch (error) {
       console.error('Error approving suggestion:', error);
@@ -240,7 +377,7 @@ const App = () => {
 
       if (response.ok) {
         alert('Suggestion rejetée !');
-        fetchSuggestions();
+        applySuggestionStatus(suggestionId, 'rejected');
       }
     } catch (error) {
       console.error('Error rejecting suggestion:', error);
@@ -294,10 +431,12 @@ const App = () => {
       });
 
       if (response.ok) {
+        rememberCausalToken(response);
         alert('Gear mis à jour avec succès !');
+        const { name, nickname, gear_id, image_url, description, category } = editingGear;
+        applyGearUpdated({ id: editingGear.id, name, nickname, gear_id, image_url, description, category });
         setShowEditGearModal(false);
         setEditingGear(null);
-        fetchGears();
       } else {
         alert('Erreur lors de la mise à jour du gear');
       }
@@ -318,8 +457,9 @@ const App = () => {
         });
 
         if (response.ok) {
+          rememberCausalToken(response);
           alert('Gear supprimé avec succès !');
-          fetchGears();
+          applyGearDeleted(gearId);
         } else {
           alert('Erreur lors de la suppression du gear');
         }
@@ -329,14 +469,8 @@ const App = () => {
     }
   };
 
-  // Filter and sort gears
-  const filteredGears = gears
-    .filter(gear => gear.category === selectedCategory)
-    .filter(gear => 
-      gear.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      gear.nickname.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      gear.description.toLowerCase().includes(searchTerm.toLowerCase())
-    )
+  // Search results replace the category pages while a search is active; both are sorted locally
+  const filteredGears = [...(searchResults || gears)]
     .sort((a, b) => {
       if (sortBy === 'name') return a.name.localeCompare(b.name);
       if (sortBy === 'nickname') return a.nickname.localeCompare(b.nickname);
@@ -347,7 +481,36 @@ const App = () => {
   // Effects
   useEffect(() => {
     fetchGears();
-  }, []);
+  }, [selectedCategory]);
+
+  // Full-text search and typeahead run on the server, once typing pauses
+  useEffect(() => {
+    const term = searchTerm.trim();
+    if (!term) {
+      setSearchResults(null);
+      setSearchSuggestions([]);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const searchParams = new URLSearchParams({ q: term, category: selectedCategory, limit: GEARS_PAGE_SIZE });
+        const [response, suggestResponse] = await Promise.all([
+          fetch(`${process.env.REACT_APP_BACKEND_URL}/api/gears/search?${searchParams}`, { headers: catalogHeaders() }),
+          fetch(`${process.env.REACT_APP_BACKEND_URL}/api/gears/suggest?${new URLSearchParams({ prefix: term })}`)
+        ]);
+        if (cancelled) return;
+        if (response.ok) setSearchResults(await response.json());
+        if (suggestResponse.ok) setSearchSuggestions(await suggestResponse.json());
+      } catch (error) {
+        console.error('Error searching gears:', error);
+      }
+    }, SEARCH_DEBOUNCE_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm, selectedCategory]);
 
   useEffect(() => {
     if (user) {
@@ -356,6 +519,73 @@ const App = () => {
     }
   }, [user]);
 
+  // Live updates over server-sent events; moderators also receive suggestion events
+  useEffect(() => {
+    let source = null;
+    let retry = null;
+    let stopped = false;
+    let lastEventId = '';
+    // EventSource cannot send headers: moderators trade their token for a short-lived stream ticket
+    const streamUrl = async () => {
+      const params = new URLSearchParams();
+      if (user) {
+        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/events/ticket`, {
+          method: 'POST',
+          headers: { 'Authorization': `Bearer ${user.token}` },
+        });
+        if (!response.ok) throw new Error('Event stream ticket refused');
+        params.set('ticket', (await response.json()).ticket);
+      }
+      if (lastEventId) params.set('last_event_id', lastEventId);
+      const query = params.toString();
+      return `${process.env.REACT_APP_BACKEND_URL}/api/events${query ? `?${query}` : ''}`;
+    };
+    const reconnect = (delay) => {
+      if (source) source.close();
+      clearTimeout(retry);
+      retry = setTimeout(connect, delay);
+    };
+    const connect = async () => {
+      let url;
+      try {
+        url = await streamUrl();
+      } catch (error) {
+        console.error('Error opening event stream:', error);
+        if (!stopped) reconnect(5000);
+        return;
+      }
+      if (stopped) return;
+      source = new EventSource(url);
+      const on = (type, handler) => source.addEventListener(type, (e) => {
+        if (e.lastEventId) lastEventId = e.lastEventId;
+        handler(JSON.parse(e.data));
+      });
+      on('gear.created', applyGearCreated);
+      on('gear.updated', applyGearUpdated);
+      on('gear.deleted', ({ id }) => applyGearDeleted(id));
+      on('catalog.reloaded', () => fetchGears());
+      on('suggestions.reloaded', () => fetchSuggestions());
+      on('suggestion.created', applySuggestionCreated);
+      on('suggestion.status_changed', ({ id, status }) => applySuggestionStatus(id, status));
+      // We fell behind: reload, then start a fresh stream rather than resuming the old one
+      on('resync', () => {
+        source.close();
+        lastEventId = '';
+        fetchGears();
+        fetchSuggestions();
+        connect();
+      });
+      // The browser would retry with the same, soon expired, ticket; reconnect with a new one
+      source.onerror = () => reconnect(3000);
+    };
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retry);
+      if (source) source.close();
+    };
+  }, [user]);
+
   if (loading) {
     return (
       <div className="loading-screen">
@@ -439,9 +669,9 @@ const App = () => {
               >
                 <span>📝</span>
                 Suggestions
-                {suggestions.filter(s => s.status === 'pending').length > 0 && (
+                {suggestionCounts.pending > 0 && (
                   <span className="notification-badge">
-                    {suggestions.filter(s => s.status === 'pending').length}
+                    {suggestionCounts.pending}
                   </span>
                 )}
               </button>
@@ -465,7 +695,13 @@ const App = () => {
                   value={searchTerm}
                   onChange={(e) => setSearchTerm(e.target.value)}
                   className="search-input"
+                  list="gear-search-suggestions"
                 />
+                <datalist id="gear-search-suggestions">
+                  {searchSuggestions.map(suggestion => (
+                    <option key={suggestion.id} value={suggestion.name} />
+                  ))}
+                </datalist>
                 <select
                   value={sortBy}
                   onChange={(e) => setSortBy(e.target.value)}
@@ -499,7 +735,7 @@ const App = () => {
                   <div className="category-info">
                     <span className="category-name">{category.name}</span>
                     <span className="category-count">
-                      {gears.filter(g => g.category === category.id).length} gears
+                      {categoryCounts[category.id] || 0} gears
                     </span>
                   </div>
                 </button>
@@ -511,7 +747,7 @@ const App = () => {
               {filteredGears.map(gear => (
                 <div key={gear.id} className="gear-card">
                   <div className="gear-image">
-                    <img src={gear.image_url} alt={gear.name} />
+                    <img src={gearImageUrl(gear)} alt={gear.name} loading="lazy" />
                     {user && (user.role === 'créateur' || user.role === 'responsable') && (
                       <div className="gear-actions">
                         <button 
@@ -555,6 +791,12 @@ const App = () => {
               ))}
             </div>
 
+            {!searchResults && nextCursor && (
+              <button className="copy-btn load-more-btn" onClick={fetchMoreGears}>
+                Voir plus de gears
+              </button>
+            )}
+
             {filteredGears.length === 0 && (
               <div className="empty-state">
                 <div className="empty-icon">🔍</div>
@@ -576,19 +818,19 @@ const App = () => {
               <h2>Suggestions en attente</h2>
               <div className="stats">
                 <span className="stat">
-                  {suggestions.filter(s => s.status === 'pending').length} en attente
+                  {suggestionCounts.pending} en attente
                 </span>
                 <span className="stat">
-                  {suggestions.filter(s => s.status === 'approved').length} approuvées
+                  {suggestionCounts.approved} approuvées
                 </span>
                 <span className="stat">
-                  {suggestions.filter(s => s.status === 'rejected').length} rejetées
+                  {suggestionCounts.rejected} rejetées
                 </span>
               </div>
             </div>
             
             <div className="suggestions-grid">
-              {suggestions.filter(s => s.status === 'pending').map(suggestion => (
+              {suggestions.map(suggestion => (
                 <div key={suggestion.id} className="suggestion-card">
                   <div className="suggestion-image">
                     <img src={suggestion.image_url} alt={suggestion.name} />
@@ -599,6 +841,11 @@ const App = () => {
                     <p className="nickname">"{suggestion.nickname}"</p>
                     <p className="gear-id">ID: {suggestion.gear_id}</p>
                     <p className="description">{suggestion.description}</p>
+                    {suggestion.similar_to && (
+                      <p className="similar-warning">
+                        ⚠️ Nom très proche d'{suggestion.similar_to.kind === 'gear' ? 'un gear existant' : 'une autre suggestion en attente'}
+                      </p>
+                    )}
                     <div className="suggestion-category">
                       <span>Catégorie: </span>
                       <span className="category-badge">{suggestion.category}</span>
@@ -631,7 +878,7 @@ const App = () => {
               ))}
             </div>
 
-            {suggestions.filter(s => s.status === 'pending').length === 0 && (
+            {suggestions.length === 0 && (
               <div className="empty-state">
                 <div className="empty-icon">✨</div>
                 <h3>Aucune suggestion en attente</h3>
@@ -7,6 +7,7 @@ import requests
 import json
 import sys
 import time
+import uuid
 from datetime import datetime
 
 # Configuration locale
@@ -20,6 +21,10 @@ BACKEND_URL = LOCAL_BACKEND_URL
 ROOT_USERNAME = "root"
 ROOT_PASSWORD = "Mouse123890!"
 
+# Uniques par exécution, pour ne pas entrer en conflit avec les données initiales ou un test précédent
+RUN_ID = uuid.uuid4().hex[:8]
+RUN_GEAR_ID = int(time.time() * 1000)
+
 class TestSuite:
     def __init__(self):
         self.passed = 0
@@ -107,9 +112,9 @@ class TestSuite:
         try:
             # Test soumission suggestion
             suggestion_data = {
-                "name": "Test Gear",
+                "name": f"Test Gear {RUN_ID}",
                 "nickname": "Test",
-                "gear_id": "123456789",
+                "gear_id": str(RUN_GEAR_ID),
                 "image_url": "https://example.com/image.png",
                 "description": "Gear de test",
                 "category": "joueurs"
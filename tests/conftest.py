@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+ROOT_CREDENTIALS = {"username": "root", "password": "Mouse123890!"}
+
+
+def gear_payload(n: int, **overrides) -> dict:
+    payload = {
+        "name": f"Test gear {n}",
+        "nickname": f"Nick {n}",
+        "gear_id": str(900000 + n),
+        "image_url": f"https://assetdelivery.roblox.com/v1/asset/?id={900000 + n}",
+        "description": f"Gear number {n}",
+        "category": "joueurs",
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """The app wired to an in-memory mongomock database.
+
+    mongomock has no transactions, sessions or read preferences, so the app
+    runs its standalone code paths.
+    """
+    from mongomock_motor import AsyncMongoMockClient
+
+    import server
+    from rate_limit import InMemoryBucketBackend
+
+    mongo_client = AsyncMongoMockClient()
+    monkeypatch.setattr(server, "create_client", lambda: mongo_client)
+    monkeypatch.setattr(type(mongo_client["db"]), "with_options", lambda self, **kwargs: self, raising=False)
+
+    async def no_transactions():
+        return False
+
+    monkeypatch.setattr(server, "detect_transaction_support", no_transactions)
+    monkeypatch.setattr(server.suggestion_limiter, "backend", InMemoryBucketBackend())
+    monkeypatch.setattr(server.suggestion_limiter, "burst", 1000)
+    return server
+
+
+@pytest.fixture
+def client(server):
+    from fastapi.testclient import TestClient
+
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth(client):
+    response = client.post("/api/auth/login", json=ROOT_CREDENTIALS)
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError
+
+from tests.conftest import gear_payload
+
+
+def suggest(client, n, **overrides) -> str:
+    response = client.post("/api/suggestions", json=gear_payload(n, **overrides))
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def suggestion(client, server, suggestion_id) -> dict:
+    return client.portal.call(lambda: server.db.suggestions.find_one({"id": suggestion_id}, {"_id": 0}))
+
+
+def live_gears(client, server, gear_id) -> list:
+    cursor = server.db.gears.find({"gear_id": gear_id, **server.LIVE_GEARS}, {"_id": 0})
+    return client.portal.call(lambda: cursor.to_list(length=None))
+
+
+def test_approve_creates_the_gear_once(client, server, auth):
+    suggestion_id = suggest(client, 1)
+
+    first = client.put(f"/api/suggestions/{suggestion_id}/approve", headers=auth)
+    again = client.put(f"/api/suggestions/{suggestion_id}/approve", headers=auth)
+
+    assert first.status_code == 200
+    assert first.json()["gear"]["gear_id"] == "900001"
+    assert again.status_code == 200
+    assert again.json() == {"message": "Suggestion already approved", "gear": None}
+    assert len(live_gears(client, server, "900001")) == 1
+    assert suggestion(client, server, suggestion_id)["status"] == "approved"
+
+
+def test_approve_after_crash_between_claim_and_insert_creates_the_claimed_gear(client, server, auth):
+    suggestion_id = suggest(client, 2)
+    # The claim was written, the process died before inserting the gear
+    client.portal.call(lambda: server.db.suggestions.update_one(
+        {"id": suggestion_id}, {"$set": {"status": "approved", "approved_gear_id": "claimed-ref"}}
+    ))
+
+    response = client.put(f"/api/suggestions/{suggestion_id}/approve", headers=auth)
+
+    assert response.status_code == 200
+    assert response.json()["gear"]["id"] == "claimed-ref"
+    assert [gear["id"] for gear in live_gears(client, server, "900002")] == ["claimed-ref"]
+    assert client.put(f"/api/suggestions/{suggestion_id}/approve", headers=auth).json()["gear"] is None
+
+
+def test_approve_rejects_a_suggestion_whose_gear_id_is_taken(client, server, auth):
+    assert client.post("/api/gears", json=gear_payload(3), headers=auth).status_code == 200
+    # Slipped past the suggestion checks, e.g. submitted before the gear was added
+    now = datetime.utcnow()
+    client.portal.call(lambda: server.db.suggestions.insert_one({
+        **gear_payload(3, name="Other name"), "id": "late", "status": "pending", "created_at": now, "updated_at": now,
+    }))
+
+    response = client.put("/api/suggestions/late/approve", headers=auth)
+
+    assert response.status_code == 409
+    stored = suggestion(client, server, "late")
+    assert stored["status"] == "rejected"
+    assert stored["rejected_reason"] == "duplicate"
+    assert "approved_gear_id" not in stored
+    assert len(live_gears(client, server, "900003")) == 1
+
+
+def test_approve_treats_a_gear_id_clash_on_id_as_already_approved(client, server, auth, monkeypatch):
+    suggestion_id = suggest(client, 4)
+
+    async def concurrent_retry(suggestion_id, session=None):
+        raise DuplicateKeyError("E11000 duplicate key", 11000, {"keyPattern": {"id": 1}})
+
+    monkeypatch.setattr(server, "claim_and_approve", concurrent_retry)
+
+    response = client.put(f"/api/suggestions/{suggestion_id}/approve", headers=auth)
+
+    assert response.status_code == 200
+    assert response.json()["gear"] is None
+    assert suggestion(client, server, suggestion_id)["status"] == "pending"
+
+
+def test_approve_of_a_rejected_suggestion_conflicts(client, auth):
+    suggestion_id = suggest(client, 5)
+    client.put(f"/api/suggestions/{suggestion_id}/reject", headers=auth)
+
+    response = client.put(f"/api/suggestions/{suggestion_id}/approve", headers=auth)
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Suggestion already rejected"
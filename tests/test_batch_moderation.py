@@ -0,0 +1,61 @@
+import pytest
+
+from tests.conftest import gear_payload
+
+
+def suggest(client, n, **overrides) -> str:
+    response = client.post("/api/suggestions", json=gear_payload(n, **overrides))
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def statuses(client, server, ids) -> dict:
+    cursor = server.db.suggestions.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "status": 1})
+    return {s["id"]: s["status"] for s in client.portal.call(lambda: cursor.to_list(length=None))}
+
+
+def batch(client, auth, ids, action) -> dict:
+    response = client.post("/api/suggestions/batch", json={"ids": ids, "action": action}, headers=auth)
+    assert response.status_code == 200, response.text
+    return {item["id"]: item["result"] for item in response.json()["results"]}
+
+
+def race_before_bulk_write(server, monkeypatch, suggestion_id, status):
+    # Another moderator settles one suggestion between our read and our write
+    collection = type(server.db.suggestions)
+    bulk_write = collection.bulk_write
+    raced = []
+
+    async def racing_bulk_write(self, operations, *args, **kwargs):
+        if self.name == "suggestions" and not raced:
+            raced.append(True)
+            await self.update_one({"id": suggestion_id}, {"$set": {"status": status}})
+        return await bulk_write(self, operations, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "bulk_write", racing_bulk_write)
+
+
+def test_batch_reject(client, server, auth):
+    ids = [suggest(client, n) for n in range(3)]
+
+    assert batch(client, auth, ids + ["missing"], "reject") == {**{i: "rejected" for i in ids}, "missing": "not_found"}
+    assert set(statuses(client, server, ids).values()) == {"rejected"}
+
+
+@pytest.mark.parametrize("action", ["reject", "approve"])
+def test_batch_reports_suggestions_settled_concurrently_as_conflicts(client, server, auth, monkeypatch, action):
+    ids = [suggest(client, n) for n in range(3)]
+    race_before_bulk_write(server, monkeypatch, ids[0], "approved" if action == "reject" else "rejected")
+
+    expected = "rejected" if action == "reject" else "approved"
+    assert batch(client, auth, ids, action) == {ids[0]: "conflict", ids[1]: expected, ids[2]: expected}
+
+
+def test_batch_approve_rejects_duplicate_gear_ids(client, server, auth):
+    assert client.post("/api/gears", json=gear_payload(10), headers=auth).status_code == 200
+    ids = [suggest(client, 11), suggest(client, 12)]
+    # Same gear_id as the cataloged gear, inserted behind the suggestion checks
+    client.portal.call(lambda: server.db.suggestions.update_one({"id": ids[1]}, {"$set": {"gear_id": "900010"}}))
+
+    assert batch(client, auth, ids, "approve") == {ids[0]: "approved", ids[1]: "duplicate"}
+    assert statuses(client, server, ids) == {ids[0]: "approved", ids[1]: "rejected"}
@@ -0,0 +1,98 @@
+import asyncio
+import base64
+from contextlib import asynccontextmanager
+
+import bson
+import pytest
+from bson import Timestamp
+from pymongo.errors import OperationFailure
+from starlette.requests import Request
+
+
+def token(**times) -> str:
+    return base64.urlsafe_b64encode(bson.encode(times)).decode()
+
+
+VALID = token(ct={"clusterTime": Timestamp(1700000000, 1), "signature": {}}, ot=Timestamp(1700000000, 1))
+
+
+def causal_request(value=None) -> Request:
+    headers = [(b"x-causal-token", value.encode())] if value is not None else []
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.fixture
+def replicated(server, monkeypatch):
+    monkeypatch.setattr(server, "transactions_supported", True)
+    return server
+
+
+@pytest.mark.parametrize("value", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not bson").decode(),
+    token(ct=1, ot=Timestamp(1, 1)),
+    token(ct={"signature": {}}, ot=Timestamp(1, 1)),
+    token(ct={"clusterTime": Timestamp(1, 1)}, ot="yesterday"),
+    token(ot=Timestamp(1, 1)),
+])
+def test_malformed_tokens_are_ignored(replicated, value):
+    assert replicated.causal_times(causal_request(value)) is None
+
+
+def test_valid_token_decodes_only_where_sessions_exist(server, monkeypatch):
+    assert server.causal_times(causal_request(VALID)) is None
+    monkeypatch.setattr(server, "transactions_supported", True)
+
+    assert server.causal_times(causal_request(VALID))["ot"] == Timestamp(1700000000, 1)
+    assert server.causal_times(causal_request()) is None
+
+
+class RefusingSession:
+    def advance_cluster_time(self, cluster_time):
+        raise OperationFailure("Cluster time signature is invalid", code=211)
+
+    def advance_operation_time(self, operation_time):
+        pass
+
+
+def test_refused_token_falls_back_to_the_primary(replicated, monkeypatch):
+    @asynccontextmanager
+    async def causal_session():
+        yield RefusingSession()
+
+    monkeypatch.setattr(replicated, "causal_session", causal_session)
+    monkeypatch.setattr(replicated, "catalog_db", "secondary")
+    monkeypatch.setattr(replicated, "db", "primary")
+    reads = []
+
+    async def read(source, session):
+        reads.append((source, session))
+        return source
+
+    assert asyncio.run(replicated.catalog_read(causal_request(VALID), read)) == "primary"
+    assert reads == [("primary", None)]
+
+
+def test_bad_tokens_do_not_fail_catalog_reads(client, server, monkeypatch):
+    monkeypatch.setattr(server, "transactions_supported", True)
+
+    @asynccontextmanager
+    async def causal_session():
+        yield RefusingSession()
+
+    monkeypatch.setattr(server, "causal_session", causal_session)
+    # mongomock has no $text, so search is only covered through catalog_read above
+    for value in (VALID, token(ct=1, ot=2), "garbage"):
+        headers = {"X-Causal-Token": value}
+        for path in ("/api/gears", "/api/gears/stats", "/api/gears/changes"):
+            assert client.get(path, headers=headers).status_code == 200, (path, value)
+
+
+def test_undecodable_token_still_uses_the_cache(client, server):
+    client.get("/api/gears")
+    cached = len(server.catalog_cache)
+
+    client.get("/api/gears", headers={"X-Causal-Token": "garbage"})
+
+    assert cached == 1
+    assert len(server.catalog_cache) == 1
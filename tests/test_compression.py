@@ -0,0 +1,136 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from compression import CompressionMiddleware, PrecompressedBody, accepted_encoding, etag_for, strip_etag_encoding
+from tests.conftest import gear_payload
+
+LARGE = json.dumps([{"n": n, "text": "gear " * 10} for n in range(100)]).encode()
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", "br"),
+    ("gzip, deflate", "gzip"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("BR ; q=0.9 , gzip;q=0.8", "br"),
+    ("gzip;q=bogus, br;q=0.1", "br"),
+    ("*", "br"),
+    ("*, br;q=0", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+])
+def test_accepted_encoding(header, expected):
+    assert accepted_encoding(header) == expected
+
+
+def test_etag_suffix_round_trips():
+    assert etag_for('"abc"', "br") == '"abc-br"'
+    assert strip_etag_encoding('"abc-br"') == '"abc"'
+    assert strip_etag_encoding('"abc-gzip"') == '"abc"'
+    assert strip_etag_encoding('"abc"') == '"abc"'
+    # Only quoted validators are suffixed
+    assert etag_for("abc", "gzip") == "abc"
+
+
+def test_precompressed_body_holds_every_encoding():
+    body = PrecompressedBody(LARGE, minimum_size=1024)
+
+    assert brotli.decompress(body.select("br")[0]) == LARGE
+    assert gzip.decompress(body.select("gzip;q=1, br;q=0.5")[0]) == LARGE
+    assert body.select("identity") == (LARGE, None)
+    assert body.select("gzip")[1] == "gzip"
+
+
+def test_small_precompressed_body_is_left_raw():
+    body = PrecompressedBody(b"[]", minimum_size=1024)
+
+    assert body.encoded == {}
+    assert body.select("br") == (b"[]", None)
+
+
+def compressing_client() -> TestClient:
+    async def large(request):
+        return Response(LARGE, media_type="application/json", headers={"ETag": '"v1"'})
+
+    async def small(request):
+        return Response(b"[]", media_type="application/json")
+
+    async def events(request):
+        return Response(LARGE, media_type="text/event-stream")
+
+    async def streamed(request):
+        async def chunks():
+            for n in range(3):
+                yield json.dumps({"n": n}).encode() + b"\n"
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    app = Starlette(routes=[Route(path, handler) for path, handler in (
+        ("/large", large), ("/small", small), ("/events", events), ("/streamed", streamed),
+    )])
+    return TestClient(CompressionMiddleware(app, minimum_size=1024))
+
+
+def test_middleware_compresses_and_suffixes_the_etag():
+    client = compressing_client()
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"v1-gzip"'
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(LARGE)
+    assert response.content == LARGE
+
+
+@pytest.mark.parametrize("path, accept", [
+    ("/large", "identity"),
+    ("/small", "gzip"),
+    ("/events", "gzip"),
+])
+def test_middleware_passes_through(path, accept):
+    response = compressing_client().get(path, headers={"Accept-Encoding": accept})
+
+    assert "content-encoding" not in response.headers
+
+
+def test_middleware_compresses_streams_chunk_by_chunk():
+    response = compressing_client().get("/streamed", headers={"Accept-Encoding": "br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+
+def test_cached_catalog_is_served_precompressed_with_per_encoding_etags(client, auth):
+    for n in range(20):
+        assert client.post("/api/gears", json=gear_payload(n), headers=auth).status_code == 200
+
+    fresh = client.get("/api/gears", headers={"Accept-Encoding": "gzip"})
+    cached = client.get("/api/gears", headers={"Accept-Encoding": "br"})
+    plain = client.get("/api/gears", headers={"Accept-Encoding": "identity"})
+
+    assert fresh.headers["etag"].endswith('-gzip"')
+    assert cached.headers["content-encoding"] == "br"
+    assert cached.headers["etag"].endswith('-br"')
+    assert "content-encoding" not in plain.headers
+    assert fresh.json() == cached.json() == plain.json()
+    assert strip_etag_encoding(cached.headers["etag"]) == plain.headers["etag"]
+
+
+def test_any_encodings_etag_revalidates_the_catalog(client, auth):
+    for n in range(20):
+        client.post("/api/gears", json=gear_payload(n), headers=auth)
+    br_etag = client.get("/api/gears", headers={"Accept-Encoding": "br"}).headers["etag"]
+
+    revalidated = client.get("/api/gears", headers={"Accept-Encoding": "gzip", "If-None-Match": br_etag})
+    changed = client.get("/api/gears", headers={"If-None-Match": '"stale"'})
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"].endswith('-gzip"')
+    assert changed.status_code == 200
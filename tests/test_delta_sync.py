@@ -0,0 +1,90 @@
+import base64
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.conftest import gear_payload
+
+
+@pytest.fixture
+def settled(server, monkeypatch):
+    # Cursors normally trail the clock; tests write and read within milliseconds
+    monkeypatch.setattr(server, "CHANGES_SETTLE_SECONDS", 0)
+    return server
+
+
+def create_gears(client, auth, count) -> list:
+    ids = []
+    for n in range(count):
+        response = client.post("/api/gears", json=gear_payload(n), headers=auth)
+        assert response.status_code == 200, response.text
+        ids.append(response.json()["id"])
+        time.sleep(0.002)
+    return ids
+
+
+def changes(client, since=None, limit=None) -> dict:
+    params = {key: value for key, value in (("since", since), ("limit", limit)) if value is not None}
+    response = client.get("/api/gears/changes", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_full_sync_pages_through_the_live_catalog(client, auth, settled):
+    ids = create_gears(client, auth, 5)
+
+    first = changes(client, limit=3)
+    second = changes(client, since=first["cursor"], limit=3)
+
+    assert first["has_more"] and not second["has_more"]
+    assert [g["id"] for g in first["changed"] + second["changed"]] == ids
+    assert first["deleted"] == second["deleted"] == []
+
+
+def test_updates_and_deletes_after_the_cursor_are_reported(client, auth, settled):
+    ids = create_gears(client, auth, 3)
+    cursor = changes(client)["cursor"]
+    time.sleep(0.002)
+
+    client.put(f"/api/gears/{ids[0]}", json=gear_payload(0, name="Renamed"), headers=auth)
+    client.delete(f"/api/gears/{ids[1]}", headers=auth)
+    delta = changes(client, since=cursor)
+
+    assert [(g["id"], g["name"]) for g in delta["changed"]] == [(ids[0], "Renamed")]
+    assert delta["deleted"] == [ids[1]]
+    # Nothing new since: the cursor comes back unchanged
+    assert changes(client, since=delta["cursor"]) == {
+        "changed": [], "deleted": [], "cursor": delta["cursor"], "has_more": False,
+    }
+
+
+def test_tombstones_keep_only_what_sync_needs(client, server, auth, settled):
+    gid = create_gears(client, auth, 1)[0]
+    client.delete(f"/api/gears/{gid}", headers=auth)
+
+    tombstone = client.portal.call(lambda: server.db.gears.find_one({"id": gid}, {"_id": 0}))
+
+    assert tombstone["deleted"] is True
+    assert set(tombstone) == {"id", "created_at", "updated_at", "deleted", "deleted_at"}
+    assert changes(client)["changed"] == []
+
+
+def test_recent_writes_stay_behind_the_cursor_until_settled(client, auth, server, monkeypatch):
+    monkeypatch.setattr(server, "CHANGES_SETTLE_SECONDS", 60)
+    gid = create_gears(client, auth, 1)[0]
+
+    first = changes(client)
+    again = changes(client, since=first["cursor"])
+
+    # Sent again on the next call rather than risk skipping a late commit
+    assert [g["id"] for g in first["changed"]] == [gid]
+    assert [g["id"] for g in again["changed"]] == [gid]
+
+
+def test_cursor_older_than_tombstone_retention_is_gone(client, server):
+    expired = datetime.utcnow() - timedelta(seconds=server.TOMBSTONE_TTL_SECONDS + 60)
+    cursor = base64.urlsafe_b64encode(json.dumps({"c": expired.isoformat(), "i": ""}).encode()).decode()
+
+    assert client.get("/api/gears/changes", params={"since": cursor}).status_code == 410
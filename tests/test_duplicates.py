@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from dedup import NearDuplicateIndex, jaccard, shingles
+from prefix_index import PrefixIndex, normalize
+from tests.conftest import gear_payload
+
+
+def test_near_duplicate_index_finds_close_names_only():
+    index = NearDuplicateIndex()
+    index.add(("gear", "a"), "Épée Légendaire")
+    index.add(("gear", "b"), "Bouclier de feu")
+
+    key, score = index.find("epee legendaire!")
+    assert key == ("gear", "a")
+    assert score >= index.threshold
+    assert index.find("Canne à pêche") is None
+    assert index.find("Épée Légendaire", exclude=("gear", "a")) is None
+
+
+def test_near_duplicate_index_forgets_removed_and_renamed_keys():
+    index = NearDuplicateIndex()
+    index.add("x", "Super Laser Gun")
+    index.add("x", "Tiny Hammer")
+
+    assert index.find("Super Laser Gun") is None
+    assert index.find("tiny hammer")[0] == "x"
+    index.remove("x")
+    assert index.find("Tiny Hammer") is None
+    assert len(index) == 0
+
+
+def test_shingles_ignore_case_accents_and_spacing():
+    assert shingles("  Épée   Rouge ") == shingles("epee rouge")
+    assert jaccard(shingles("abc"), set()) == 0.0
+
+
+def test_prefix_index_matches_word_starts_and_gear_ids():
+    index = PrefixIndex()
+    index.build([
+        {"id": "1", "name": "Épée Légendaire", "nickname": "Lame", "gear_id": "125013769"},
+        {"id": "2", "name": "Bouclier", "nickname": "Mur", "gear_id": "125099"},
+    ])
+
+    assert [g["id"] for g in index.suggest("leg")] == ["1"]
+    assert [g["id"] for g in index.suggest("1250")] == ["1", "2"]
+    assert index.suggest("1250", limit=1) == [{"id": "1", "name": "Épée Légendaire", "nickname": "Lame", "gear_id": "125013769"}]
+    assert index.suggest("   ") == []
+
+
+def test_prefix_index_add_replaces_and_remove_forgets():
+    index = PrefixIndex()
+    index.build([])
+    index.add({"id": "1", "name": "Hammer", "gear_id": "1"})
+    index.add({"id": "1", "name": "Sword", "gear_id": "1"})
+
+    assert index.suggest("ham") == []
+    assert [g["name"] for g in index.suggest("sw")] == ["Sword"]
+    index.remove("1")
+    assert index.suggest("sw") == []
+    assert len(index) == 0
+    assert normalize(" ÉPÉE ") == "epee"
+
+
+def test_similar_name_is_flagged_not_rejected(client, auth):
+    created = client.post("/api/gears", json=gear_payload(1, name="Épée Légendaire"), headers=auth)
+    assert created.status_code == 200, created.text
+
+    response = client.post("/api/suggestions", json=gear_payload(2, name="epee legendaire"))
+
+    assert response.status_code == 200, response.text
+    similar = response.json()["similar_to"]
+    assert similar["kind"] == "gear"
+    assert similar["id"] == created.json()["id"]
+    assert client.post("/api/suggestions", json=gear_payload(3, name="Canne à pêche")).json()["similar_to"] is None
+
+
+def test_similar_pending_suggestion_is_flagged(client):
+    first = client.post("/api/suggestions", json=gear_payload(1, name="Super Laser Gun")).json()
+
+    second = client.post("/api/suggestions", json=gear_payload(2, name="Super Laser Gun"))
+
+    assert second.status_code == 200
+    assert second.json()["similar_to"]["kind"] == "suggestion"
+    assert second.json()["similar_to"]["id"] == first["id"]
+
+
+def test_same_gear_id_is_rejected(client, auth):
+    assert client.post("/api/gears", json=gear_payload(1), headers=auth).status_code == 200
+
+    response = client.post("/api/suggestions", json=gear_payload(1, name="Another name"))
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "This gear is already in the catalog"
+
+
+def insert_duplicate_gears(client, server):
+    client.portal.call(lambda: server.db.gears.drop_index("gear_id_live_unique"))
+    now = datetime.utcnow()
+    docs = [
+        {**gear_payload(1), "id": "old", "created_at": now - timedelta(days=1), "updated_at": now},
+        {**gear_payload(1), "id": "new", "created_at": now, "updated_at": now},
+    ]
+    client.portal.call(lambda: server.db.gears.insert_many(docs))
+
+
+def test_startup_refuses_to_delete_duplicate_gear_ids_by_default(client, server, caplog):
+    insert_duplicate_gears(client, server)
+
+    with pytest.raises(RuntimeError, match="DEDUPE_GEAR_IDS_ON_START"):
+        client.portal.call(server.dedupe_gear_ids)
+
+    assert "Duplicate gear_id 900001 in gears: old, new" in caplog.text
+    remaining = client.portal.call(lambda: server.db.gears.count_documents({"gear_id": "900001"}))
+    assert remaining == 2
+
+
+def test_startup_dedupe_keeps_the_oldest_gear_when_enabled(client, server, monkeypatch):
+    insert_duplicate_gears(client, server)
+    monkeypatch.setattr(server, "DEDUPE_GEAR_IDS_ON_START", True)
+
+    client.portal.call(server.dedupe_gear_ids)
+
+    extra = client.portal.call(lambda: server.db.gears.find_one({"id": "new"}))
+    assert extra["deleted"] is True
+    kept = client.portal.call(lambda: server.db.gears.find_one({"id": "old"}))
+    assert kept.get("deleted") is not True
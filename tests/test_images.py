@@ -0,0 +1,168 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from PIL import Image
+from starlette.requests import Request
+
+import server
+from images import DiskCache, ImageError, ImageProxy
+
+SOURCE_URL = "https://tr.rbxcdn.com/asset.png"
+# Hosts the fake resolver maps to internal addresses
+INTERNAL_HOSTS = {"internal.rbxcdn.com": "10.0.0.5", "metadata.roblox.com": "169.254.169.254"}
+
+
+def png(width=400, height=200) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(out, "PNG")
+    return out.getvalue()
+
+
+class Origin:
+    """httpx.MockTransport handler serving canned responses by URL."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(str(request.url))
+        route = self.routes.get(str(request.url))
+        if route is None:
+            return httpx.Response(404)
+        return route()
+
+
+async def fake_resolve(self, host, port):
+    return [INTERNAL_HOSTS.get(host, "93.184.216.34")]
+
+
+def make_proxy(tmp_path, origin, monkeypatch, max_source_bytes=1024 * 1024):
+    monkeypatch.setattr(ImageProxy, "resolve", fake_resolve)
+    proxy = ImageProxy(DiskCache(str(tmp_path), max_bytes=10 * 1024 * 1024), max_source_bytes, ["roblox.com", "*.rbxcdn.com"])
+    proxy.client = proxy.create_client(4, 5.0, transport=httpx.MockTransport(origin))
+    return proxy
+
+
+def run(proxy, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await proxy.client.aclose()
+    return asyncio.run(main())
+
+
+def test_thumbnail_is_resized(tmp_path, monkeypatch):
+    origin = Origin({SOURCE_URL: lambda: httpx.Response(200, content=png())})
+    proxy = make_proxy(tmp_path, origin, monkeypatch)
+
+    data = run(proxy, proxy.thumbnail(SOURCE_URL, 128, "webp"))
+
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.format == "WEBP"
+        assert image.size == (128, 64)
+
+
+def test_second_request_is_served_from_cache(tmp_path, monkeypatch):
+    origin = Origin({SOURCE_URL: lambda: httpx.Response(200, content=png())})
+    proxy = make_proxy(tmp_path, origin, monkeypatch)
+
+    async def twice():
+        first = await proxy.thumbnail(SOURCE_URL, 64, "jpeg")
+        # Another width reuses the cached source
+        await proxy.thumbnail(SOURCE_URL, 128, "jpeg")
+        return first, await proxy.thumbnail(SOURCE_URL, 64, "jpeg")
+
+    first, again = run(proxy, twice())
+    assert first == again
+    assert origin.requests == [SOURCE_URL]
+
+
+def test_redirect_to_allowed_host_is_followed(tmp_path, monkeypatch):
+    target = "https://c0.rbxcdn.com/asset.png"
+    origin = Origin({
+        SOURCE_URL: lambda: httpx.Response(302, headers={"location": target}),
+        target: lambda: httpx.Response(200, content=png()),
+    })
+    proxy = make_proxy(tmp_path, origin, monkeypatch)
+
+    run(proxy, proxy.source(SOURCE_URL))
+    assert origin.requests == [SOURCE_URL, target]
+
+
+@pytest.mark.parametrize("target", [
+    "https://evil.example.com/asset.png",
+    "https://rbxcdn.com.evil.example/asset.png",
+    "http://internal.rbxcdn.com/asset.png",
+    "http://metadata.roblox.com/latest/meta-data/",
+    "http://127.0.0.1:6379/",
+])
+def test_redirect_outside_allowlist_is_refused(tmp_path, monkeypatch, target):
+    origin = Origin({
+        SOURCE_URL: lambda: httpx.Response(302, headers={"location": target}),
+        target: lambda: httpx.Response(200, content=png()),
+    })
+    proxy = make_proxy(tmp_path, origin, monkeypatch)
+
+    with pytest.raises(ImageError):
+        run(proxy, proxy.source(SOURCE_URL))
+    assert origin.requests == [SOURCE_URL]
+
+
+def test_source_over_size_cap_is_refused(tmp_path, monkeypatch):
+    origin = Origin({SOURCE_URL: lambda: httpx.Response(200, content=b"x" * 2048)})
+    proxy = make_proxy(tmp_path, origin, monkeypatch, max_source_bytes=1024)
+
+    with pytest.raises(ImageError, match="too large"):
+        run(proxy, proxy.source(SOURCE_URL))
+    assert len(proxy.cache) == 0
+
+
+class FakeGears:
+    def __init__(self, image_url):
+        self.image_url = image_url
+
+    async def find_one(self, query, projection=None):
+        return {"image_url": self.image_url} if query["id"] == "gear-1" else None
+
+
+def image_request(headers=None) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/api/images/gear-1", "headers": raw, "query_string": b""})
+
+
+def test_endpoint_revalidates_with_etag(tmp_path, monkeypatch):
+    origin = Origin({SOURCE_URL: lambda: httpx.Response(200, content=png())})
+    proxy = make_proxy(tmp_path, origin, monkeypatch)
+    monkeypatch.setattr(server, "image_proxy", proxy)
+    monkeypatch.setattr(server, "catalog_db", SimpleNamespace(gears=FakeGears(SOURCE_URL)))
+
+    async def exchange():
+        first = await server.get_gear_image(image_request({"Accept": "image/webp"}), "gear-1", w=64)
+        second = await server.get_gear_image(
+            image_request({"Accept": "image/webp", "If-None-Match": first.headers["etag"]}), "gear-1", w=64
+        )
+        return first, second
+
+    first, second = run(proxy, exchange())
+    assert first.status_code == 200
+    assert first.media_type == "image/webp"
+    assert second.status_code == 304
+    assert second.body == b""
+    assert origin.requests == [SOURCE_URL]
+
+
+def test_endpoint_hides_origin_failure(tmp_path, monkeypatch):
+    internal = "http://internal.rbxcdn.com:6379/"
+    proxy = make_proxy(tmp_path, Origin({}), monkeypatch)
+    monkeypatch.setattr(server, "image_proxy", proxy)
+    monkeypatch.setattr(server, "catalog_db", SimpleNamespace(gears=FakeGears(internal)))
+
+    with pytest.raises(server.HTTPException) as raised:
+        run(proxy, server.get_gear_image(image_request(), "gear-1", w=64))
+    assert raised.value.status_code == 502
+    assert raised.value.detail == "Image unavailable"
@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, MetricsDirectory, Registry
+
+
+def worker_registry():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests.", ("route",)))
+    in_flight = registry.register(Gauge("in_flight", "In flight.", ("route",)))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+    registry.add_collector(lambda: [("cache_entries", "Cache entries.", 3)])
+    return registry, requests, in_flight, latency
+
+
+def dead_pid() -> str:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return str(process.pid)
+
+
+@pytest.fixture
+def scraped(tmp_path):
+    """A worker registry and its directory, already holding a live and an exited worker's files."""
+    registry, requests, in_flight, latency = worker_registry()
+    for pid in ("1", dead_pid()):
+        other, other_requests, other_in_flight, other_latency = worker_registry()
+        other_requests.inc("/a", amount=2)
+        other_in_flight.set("/a", value=5)
+        other_latency.observe("/a", value=0.5)
+        (tmp_path / f"{pid}.json").write_text(json.dumps(other.snapshot()))
+    requests.inc("/a")
+    in_flight.set("/a", value=1)
+    latency.observe("/a", value=0.05)
+    return MetricsDirectory(str(tmp_path), registry)
+
+
+def test_counters_and_histograms_sum_every_worker_including_exited_ones(scraped):
+    text = scraped.render()
+
+    assert 'requests_total{route="/a"} 5' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+
+
+def test_gauges_are_reported_per_live_worker(scraped):
+    text = scraped.render()
+    own = str(os.getpid())
+
+    assert f'in_flight{{route="/a",pid="{own}"}} 1' in text
+    assert 'in_flight{route="/a",pid="1"} 5' in text
+    assert text.count("in_flight{") == 2
+    assert f'cache_entries{{pid="{own}"}} 3' in text
+    assert text.count("cache_entries{") == 2
+    assert text.count("# TYPE cache_entries gauge") == 1
+
+
+def test_write_replaces_this_workers_file_and_clear_empties_the_directory(tmp_path):
+    registry, requests, _, _ = worker_registry()
+    directory = MetricsDirectory(str(tmp_path), registry)
+    requests.inc("/b")
+    directory.write()
+    requests.inc("/b")
+    directory.write()
+
+    snapshot = directory.read()[str(os.getpid())]
+    assert snapshot["metrics"]["requests_total"] == [[["/b"], 2]]
+    (tmp_path / "123.json.tmp").write_text("{")
+    directory.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_unreadable_files_are_skipped(tmp_path):
+    registry, requests, _, _ = worker_registry()
+    (tmp_path / "42.json").write_text("{half written")
+    requests.inc("/c")
+
+    assert 'requests_total{route="/c"} 1' in MetricsDirectory(str(tmp_path), registry).render()
+
+
+def test_metrics_endpoint_reports_other_workers(client, server, monkeypatch, tmp_path):
+    other = Registry()
+    other.register(Counter("http_requests_total", "HTTP requests.", ("method", "route", "status"))).inc(
+        "GET", "/api/gears", "200", amount=40)
+    (tmp_path / "1.json").write_text(json.dumps(other.snapshot()))
+    monkeypatch.setattr(server, "metrics_directory", MetricsDirectory(str(tmp_path), server.registry))
+    client.get("/api/gears")
+
+    text = client.get("/metrics").text
+
+    line = next(l for l in text.splitlines() if l.startswith('http_requests_total{method="GET",route="/api/gears",status="200"}'))
+    assert float(line.split()[-1]) >= 41
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from rate_limit import BucketBackend, InMemoryBucketBackend, RateLimiter, retry_after_header
+from tests.conftest import gear_payload
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("rate_limit.time.monotonic", clock)
+    return clock
+
+
+def take(backend, key="k", rate=1.0, burst=3.0):
+    return asyncio.run(backend.take(key, rate, burst))
+
+
+def test_backend_without_take_cannot_be_constructed():
+    class Incomplete(BucketBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_bucket_allows_the_burst_then_refuses_until_refilled(clock):
+    backend = InMemoryBucketBackend()
+
+    assert [take(backend)[0] for _ in range(3)] == [True, True, True]
+    allowed, wait = take(backend)
+    assert not allowed
+    assert wait == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert take(backend)[0]
+    assert not take(backend)[0]
+
+
+def test_bucket_refill_is_capped_at_the_burst(clock):
+    backend = InMemoryBucketBackend()
+    take(backend)
+    clock.now += 3600
+
+    assert [take(backend)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_buckets_are_per_key_and_least_recently_used_keys_are_dropped(clock):
+    backend = InMemoryBucketBackend(max_keys=2)
+    for _ in range(3):
+        take(backend, "a")
+    assert not take(backend, "a")[0]
+    assert take(backend, "b")[0]
+
+    take(backend, "c")
+    # "a" was evicted, so it starts again from a full bucket
+    assert take(backend, "a")[0]
+
+
+def test_limiter_waits_for_the_slowest_key(clock):
+    limiter = RateLimiter(InMemoryBucketBackend(), rate=0.5, burst=1)
+    assert asyncio.run(limiter.check("ip", "fingerprint")) == 0
+    asyncio.run(limiter.backend.take("fingerprint", 0.25, 1))
+
+    assert asyncio.run(limiter.check("ip", "fingerprint")) == pytest.approx(2.0)
+    assert retry_after_header(0.2) == "1"
+    assert retry_after_header(2.1) == "3"
+
+
+def forwarded_request(forwarded=None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 4321)})
+
+
+@pytest.mark.parametrize("hops, forwarded, expected", [
+    (0, "6.6.6.6", "10.0.0.1"),
+    (1, "6.6.6.6, 1.2.3.4", "1.2.3.4"),
+    (2, "6.6.6.6, 1.2.3.4, 10.0.0.2", "1.2.3.4"),
+    (2, "1.2.3.4", "10.0.0.1"),
+    (1, None, "10.0.0.1"),
+])
+def test_client_ip_counts_trusted_hops_from_the_right(server, monkeypatch, hops, forwarded, expected):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", hops)
+
+    assert server.client_ip(forwarded_request(forwarded)) == expected
+
+
+def test_suggestions_are_throttled_per_client(client, server, monkeypatch):
+    monkeypatch.setattr(server.suggestion_limiter, "burst", 2)
+    monkeypatch.setattr(server.suggestion_limiter, "rate", 0.001)
+
+    statuses = [client.post("/api/suggestions", json=gear_payload(n)).status_code for n in range(3)]
+
+    assert statuses == [200, 200, 429]
+    throttled = client.post("/api/suggestions", json=gear_payload(9))
+    assert int(throttled.headers["retry-after"]) >= 1
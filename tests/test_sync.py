@@ -0,0 +1,72 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import gear_payload
+
+
+@pytest.fixture
+def fast_sync(server, monkeypatch):
+    monkeypatch.setattr(server, "CATALOG_SYNC_INTERVAL", 0.02)
+    rebuilds = []
+    rebuild_gear_indexes = server.rebuild_gear_indexes
+
+    async def counting_rebuild():
+        rebuilds.append(True)
+        await rebuild_gear_indexes()
+
+    monkeypatch.setattr(server, "rebuild_gear_indexes", counting_rebuild)
+    return rebuilds
+
+
+def foreign_write(client, server, collection, doc):
+    # Another worker's write: the document plus its bump of the shared counter
+    async def write():
+        await server.db[collection].insert_one(doc)
+        await server.db.stats.update_one({"_id": server.SYNC_STATE_ID}, {"$inc": {collection: 1}}, upsert=True)
+    client.portal.call(write)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_foreign_suggestion_only_reloads_suggestion_names(fast_sync, client, server):
+    rebuilds_at_start = len(fast_sync)
+    version = server.catalog_cache.version
+    now = datetime.utcnow()
+
+    foreign_write(client, server, "suggestions", {
+        **gear_payload(1, name="Golden Rocket Launcher"), "id": "s1", "status": "pending", "created_at": now, "updated_at": now,
+    })
+
+    wait_for(lambda: server.name_index.find("Golden Rocket Launcher") is not None)
+    assert server.name_index.find("Golden Rocket Launcher")[0] == ("suggestion", "s1")
+    assert len(fast_sync) == rebuilds_at_start
+    assert server.catalog_cache.version == version
+
+
+def test_foreign_gear_rebuilds_the_catalog_indexes(fast_sync, client, server):
+    version = server.catalog_cache.version
+    now = datetime.utcnow()
+
+    foreign_write(client, server, "gears", {**gear_payload(2, name="Storm Staff"), "id": "g2", "created_at": now, "updated_at": now})
+
+    wait_for(lambda: server.gear_prefix_index.suggest("storm"))
+    assert server.catalog_cache.version > version
+    assert server.name_index.find("Storm Staff")[0] == ("gear", "g2")
+
+
+def test_suggestion_names_rebuild_keeps_gear_names(client, server, auth):
+    client.post("/api/gears", json=gear_payload(3, name="Crystal Sword"), headers=auth)
+    client.post("/api/suggestions", json=gear_payload(4, name="Shadow Lance"))
+    client.portal.call(lambda: server.db.suggestions.update_many({}, {"$set": {"status": "rejected"}}))
+
+    client.portal.call(server.rebuild_suggestion_names)
+
+    assert server.name_index.find("Crystal Sword")[0][0] == "gear"
+    assert server.name_index.find("Shadow Lance") is None